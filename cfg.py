@@ -18,42 +18,76 @@ seed = 428094
 experiment_data = "/home/lokew/Documents/code/UPPAAL-Experiment-Runner/output_cfg/"
 plots = []
 extensions = ["svg", "eps"]
-def get_error_per_bitsuffing(ax, data, TARGET_QUERY_ID = 0, X_OFFSET = 2):
-    if not data:
-        raise ValueError("No experiment data available.")
+
+QUERY_IDS = range(4)
+BITSTUFFING_PARAM = "project.Bitstuffing"
+# Bitstuffing values index straight into a fixed list of buckets
+N_BUCKETS = max(vars['project']['Bitstuffing']) + 1
+# Draw the per bucket mean marker on the box plots
+SHOW_MEANS = False
+# key: id(data), value: {query id: (bitstuffing values, box plot stats)}
+_metrics_cache = {}
+
+def compute_bxp_stats(values, label):
+    arr = np.asarray(values)
+    # Quartiles via selection instead of a full sort, interpolated like np.percentile
+    pos = np.array([0.25, 0.5, 0.75]) * (len(arr) - 1)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.ceil(pos).astype(np.intp)
+    part = np.partition(arr, np.unique(np.concatenate([lo, hi])))
+    q1, med, q3 = part[lo] + (part[hi] - part[lo]) * (pos - lo)
+    iqr = q3 - q1
+    inside = arr[(arr >= q1 - 1.5 * iqr) & (arr <= q3 + 1.5 * iqr)]
+    # Clamped to the box like cbook.boxplot_stats, a skewed bucket never ends a whisker inside it
+    whislo = min(inside.min(), q1)
+    whishi = max(inside.max(), q3)
+    return {
+        'label': label,
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': whislo,
+        'whishi': whishi,
+        'fliers': arr[(arr < whislo) | (arr > whishi)],
+    }
+
+def empty_bxp_stats(label):
+    # Keeps the slot and tick label of a bucket without values, nothing is drawn in it
+    return dict.fromkeys(('med', 'q1', 'q3', 'whislo', 'whishi', 'mean'), np.nan) | {'label': label, 'fliers': np.empty(0)}
+
+def compute_all_metrics(data):
+    cache_key = id(data)
+    if cache_key in _metrics_cache:
+        return _metrics_cache[cache_key]
 
     print(f"Processing {len(data)} variations for box plots...")
 
-    # Group by timeslot value first
-    grouped_data = {}  # key: timeslot value, value: list of last values
-    # Process each variation
-    for _, data in data.items():
-        if not data.get('success', False):
-            continue
-        assignment = data.get('assignment', {})
-        bitstuffing = get_var_val(assignment, "project", "Bitstuffing")
-        
-        # Initialize group if not exists
-        if bitstuffing not in grouped_data:
-            grouped_data[bitstuffing] = []
-        # Extract last values from all traces
-        data_points = data.get('data_points', {})
-        data_points = data_points[TARGET_QUERY_ID]
-        for _, points in data_points.items():
-            if points:
-                try:
-                    last_value = float(points[-1][1])
-                    grouped_data[bitstuffing].append(last_value)
-                except (ValueError, IndexError, TypeError):
-                    continue
-
-    # Convert to plot-ready format
-    X = []
-    Y = []
-    for bitstuffing, values in sorted(grouped_data.items()):
-        X.append(bitstuffing+X_OFFSET)
-        Y.append(values)
-    ax.boxplot(Y, tick_labels=X)
+    arrays = load_summary(experiment_data, data)
+    bitstuffing_per_variation = arrays.params[BITSTUFFING_PARAM].astype(np.int32)
+    bitstuffing = arrays.per_row(bitstuffing_per_variation)
+    successful = arrays.per_row(arrays.success)
+    # Every bitstuffing value with a successful run gets a slot, even when it has no values
+    buckets = np.unique(bitstuffing_per_variation[arrays.success]).tolist()
+
+    metrics = {}
+    for qid in QUERY_IDS:
+        mask = successful & (arrays.query_ids == qid)
+        counts, sums, _, offsets, packed = group_last_values(bitstuffing[mask], arrays.last_values[mask], N_BUCKETS)
+        # Means come straight from the bucket sums, only quartiles need the values
+        metrics[qid] = (buckets, [dict(compute_bxp_stats(packed[offsets[b]:offsets[b + 1]], b), mean=sums[b] / counts[b])
+                                  if b < len(counts) and counts[b] else empty_bxp_stats(b) for b in buckets])
+    _metrics_cache[cache_key] = metrics
+    return metrics
+
+def _render(ax, groups, X_OFFSET):
+    X, stats = groups
+    if stats:
+        ax.bxp([dict(st, label=x+X_OFFSET) for x, st in zip(X, stats)], showfliers=True, showmeans=SHOW_MEANS)
+
+def get_error_per_bitsuffing(ax, data, TARGET_QUERY_ID = 0, X_OFFSET = 2):
+    if not data:
+        raise ValueError("No experiment data available.")
+    _render(ax, compute_all_metrics(data)[TARGET_QUERY_ID], X_OFFSET)
 
 def errors_per_qubit(ax, data):
     get_error_per_bitsuffing(ax, data)
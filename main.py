@@ -4,23 +4,120 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import queue
 import json
+import re
+import math
 import traceback
 from datetime import datetime
-import numpy as np
 import pickle
-from collections import OrderedDict
-from lxml import etree as xml
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
 import os 
+import importlib.util
+import marshal
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
 
 import process_model
 
+def _json_default(obj):
+    """Arrays and NumPy scalars as plain values, a repr would be truncated and not load back"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+try:
+    import orjson
+    
+    def _dumps(obj):
+        """Serialize to indented JSON bytes, NumPy arrays included"""
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumps(obj):
+        """Serialize to indented JSON bytes"""
+        return json.dumps(obj, indent=2, default=_json_default).encode()
+
+# Placeholder left in exported JSON for an array stored in the companion .npz
+_ARRAY_REF = '__npz__'
+
+def _split_arrays(obj, path, arrays):
+    """Move numeric NumPy arrays out of obj into arrays, keyed by their path"""
+    if isinstance(obj, dict):
+        return {k: _split_arrays(v, f'{path}/{k}', arrays) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_split_arrays(v, f'{path}/{i}', arrays) for i, v in enumerate(obj)]
+    # Duck typed so numpy is not imported just to export plain data
+    if getattr(obj, 'ndim', 0) > 0 and getattr(obj, 'dtype', None) is not None and obj.dtype.kind in 'biufc':
+        arrays[path] = obj
+        return {_ARRAY_REF: path}
+    return obj
+
+def _join_arrays(obj, arrays):
+    """Inverse of _split_arrays"""
+    if isinstance(obj, dict):
+        if len(obj) == 1 and _ARRAY_REF in obj:
+            return arrays[obj[_ARRAY_REF]]
+        return {k: _join_arrays(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_join_arrays(v, arrays) for v in obj]
+    return obj
+
+# Scatter arguments that Line2D would take with a different meaning, or not at all
+_SCATTER_ONLY_ARGS = frozenset(('c', 's', 'cmap', 'norm', 'vmin', 'vmax', 'edgecolors', 'linewidths', 'plotnonfinite'))
+
+# One pass tokenizer for the code editor, group names double as tag names
+_TOKEN_RE = re.compile(
+    r'(?P<comment>#[^\n]*)'
+    r'|(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')'
+    r'|(?P<number>\b\d+(?:\.\d+)?\b)'
+    r'|(?P<keyword>\b(?:def|class|if|else|elif|for|while|return|import|from|as|try|except|finally|with|yield|lambda|pass|break|continue|not|and|or|in|is|None|True|False)\b)'
+    r'|(?P<builtin>\b(?:len|range|print|dict|list|tuple|set|str|int|float|enumerate|zip|map|filter|sorted|min|max|sum|abs|isinstance)\b)')
+
+_TRANSFORM_NAMESPACE = None
+
+def _transform_namespace():
+    """Modules and builtins shared by every transformation, imported on first use"""
+    global _TRANSFORM_NAMESPACE
+    if _TRANSFORM_NAMESPACE is None:
+        import math
+        import statistics
+        import numpy as np
+        _TRANSFORM_NAMESPACE = {
+            'np': np,
+            'math': math,
+            'statistics': statistics,
+            'json': json,
+            'list': list,
+            'range': range,
+            'dict': dict
+        }
+    return _TRANSFORM_NAMESPACE
+
+# (raw_data, table, results) of a transformation worker process, sent once per worker
+_worker_data = None
+
+def _init_transform_worker(raw_data, table, results):
+    global _worker_data
+    _worker_data = (raw_data, table, results)
+
+def _code_uses(code, name):
+    """Whether code, or a function or comprehension in it, looks up the global name"""
+    return name in code.co_names or any(isinstance(c, type(code)) and _code_uses(c, name) for c in code.co_consts)
+
+def _run_transformation(code_bytes, use_jit):
+    """Run a marshalled transformation in a worker process, returning (result, plot_args)"""
+    raw_data, table, results = _worker_data
+    def jit(func):
+        if not use_jit:
+            return func
+        from numba import njit
+        return njit(fastmath=True)(func)
+    namespace = dict(_transform_namespace(), raw_data=raw_data, table=table, jit=jit, results=results)
+    exec(marshal.loads(code_bytes), namespace)
+    return namespace.get("result"), namespace.get("plot_args")
+
 class SyntaxHighlightingText(scrolledtext.ScrolledText):
     """Text widget with basic Python syntax highlighting"""
     
+    TAGS = ('keyword', 'string', 'comment', 'number', 'builtin')
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.tag_config('keyword', foreground='blue', font=('Consolas', 10, 'bold'))
@@ -28,36 +125,257 @@ class SyntaxHighlightingText(scrolledtext.ScrolledText):
         self.tag_config('comment', foreground='gray', font=('Consolas', 10, 'italic'))
         self.tag_config('number', foreground='purple', font=('Consolas', 10))
         self.tag_config('builtin', foreground='darkorange', font=('Consolas', 10))
-        self.bind('<KeyRelease>', self._highlight)
-    
-    def _highlight(self, event=None):
-        """Apply basic syntax highlighting"""
-        for tag in ['keyword', 'string', 'comment', 'number', 'builtin']:
-            self.tag_remove(tag, '1.0', tk.END)
-        
-        text = self.get('1.0', tk.END)
-        lines = text.split('\n')
-        line_num = 1
-        
-        for line in lines:
-            # Comments
-            if '#' in line:
-                start = line.find('#')
-                self.tag_add('comment', f'{line_num}.{start}', f'{line_num}.{len(line)}')
-            
-            # Strings
-            for quote in ['"', "'"]:
-                start = 0
-                while True:
-                    start = line.find(quote, start)
-                    if start == -1: break
-                    end = line.find(quote, start + 1)
-                    if end == -1: break
-                    self.tag_add('string', f'{line_num}.{start}', f'{line_num}.{end+1}')
-                    start = end + 1
-            line_num += 1
+        self._dirty = None  # (first, last) lines waiting to be highlighted
+        self._pending = None
+        self._edit_line = 1
+        self._line_cache = {}  # line number -> (hash of text or None if edited, [(tag, start, end)])
+        self._line_total = 1
+        self._text = None  # buffer contents as of the last edit, fetched on demand
+        self.bind('<<Modified>>', self._on_modified)
+        for event in ('<<Paste>>', '<<Undo>>', '<<Redo>>'):
+            self.bind(event, lambda _: self._line_cache.clear(), add='+')
+        self.configure(yscrollcommand=self._on_yscroll)
+    
+    def insert(self, *args, **kwargs):
+        self._text = None
+        return super().insert(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        self._text = None
+        return super().delete(*args, **kwargs)
+    
+    def text(self):
+        """Whole buffer, only copied out of Tk again after an edit"""
+        if self._text is None:
+            self._text = self.get(1.0, tk.END)
+        return self._text
+    
+    def _line_of(self, index):
+        """Line number of a text index"""
+        return int(self.index(index).split('.')[0])
+    
+    def _visible_range(self):
+        """First and last line currently shown"""
+        return self._line_of('@0,0'), self._line_of(f'@0,{self.winfo_height()}')
+    
+    def _line_count(self):
+        """Number of lines in the buffer, without copying it"""
+        return self._line_of('end-1c')
+    
+    def _on_modified(self, event=None):
+        """Mark the lines between the previous and current edit as dirty"""
+        if not self.edit_modified():
+            return
+        self._text = None
+        line = self._line_of(tk.INSERT)
+        first, last = min(line, self._edit_line), max(line, self._edit_line)
+        total = self._line_count()
+        if total != self._line_total:
+            # Lines below the edit moved, their cache entries describe other lines now
+            self._line_cache = {n: entry for n, entry in self._line_cache.items() if n < first}
+            self._line_total = total
+        else:
+            # Edited lines keep their old spans, which bound the tags they can still carry
+            for line_num in range(first, last + 1):
+                cached = self._line_cache.get(line_num)
+                if cached is not None:
+                    self._line_cache[line_num] = (None, cached[1])
+        self._mark_dirty(first, last)
+        self._edit_line = line
+        self.edit_modified(False)
+    
+    def _on_yscroll(self, first, last):
+        """Keep the scrollbar in sync and highlight lines scrolled into view"""
+        self.vbar.set(first, last)
+        # Everything is dirty, _flush clips it to the view
+        self._mark_dirty(1, float('inf'))
+    
+    def _mark_dirty(self, first, last):
+        """Queue lines for highlighting, coalescing bursts into one idle pass"""
+        if self._dirty:
+            first, last = min(first, self._dirty[0]), max(last, self._dirty[1])
+        self._dirty = (first, last)
+        if self._pending is None:
+            self._pending = self.after_idle(self._flush)
+    
+    def _flush(self):
+        """Highlight the dirty lines that are visible"""
+        self._pending = None
+        if not self._dirty:
+            return
+        first, last = self._dirty
+        self._dirty = None
+        view_first, view_last = self._visible_range()
+        first, last = max(first, view_first), min(last, view_last, self._line_count())
+        if first <= last:
+            self._highlight(first, last)
+    
+    def _highlight(self, first=None, last=None):
+        """Apply basic syntax highlighting, defaulting to the visible lines"""
+        if first is None:
+            # Full refresh, the buffer may have been replaced wholesale
+            self._line_cache.clear()
+            first, last = self._visible_range()
+        
+        # Collect index pairs so each tag costs one Tcl call, not one per token
+        stale = {tag: [] for tag in self.TAGS}
+        by_tag = {tag: [] for tag in self.TAGS}
+        text = self.get(f'{first}.0', f'{last}.end')
+        for line_num, line in enumerate(text.split('\n'), first):
+            h = hash(line)
+            cached = self._line_cache.get(line_num)
+            if cached is not None and cached[0] == h:
+                continue
+            # Only clear the tags the line may carry, all of them if unknown
+            old_tags = {tag for tag, _, _ in cached[1]} if cached is not None else self.TAGS
+            for tag in old_tags:
+                stale[tag] += (f'{line_num}.0', f'{line_num}.end')
+            # Blank lines cannot hold a token, skip the regex engine for them
+            spans = [(m.lastgroup, m.start(), m.end()) for m in _TOKEN_RE.finditer(line)] if line.strip() else []
+            self._line_cache[line_num] = (h, spans)
+            for tag, start, end in spans:
+                by_tag[tag] += (f'{line_num}.{start}', f'{line_num}.{end}')
+        for tag, indices in stale.items():
+            if indices:
+                self.tk.call(self._w, 'tag', 'remove', tag, *indices)
+        for tag, indices in by_tag.items():
+            if indices:
+                self.tk.call(self._w, 'tag', 'add', tag, *indices)
+
+class ResultTable:
+    """Columnar experiment results, one row per trace sample"""
+    
+    def __init__(self):
+        self.columns = {}  # column name -> np.ndarray, all of length n
+        self.n = 0
+        self.label_index = {}  # trace name -> integer code used in the 'trace' column
+    
+    def label_code(self, label):
+        """Integer code of a trace name, assigning a new one if needed"""
+        return self.label_index.setdefault(label, len(self.label_index))
+    
+    @property
+    def labels(self):
+        """Trace names indexed by their code"""
+        return list(self.label_index)
+    
+    def add_rows(self, columns):
+        """Append equally long column arrays"""
+        import numpy as np
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        if self.n and set(columns) != set(self.columns):
+            raise ValueError("Columns do not match the table")
+        for name, values in columns.items():
+            values = np.asarray(values)
+            self.columns[name] = np.concatenate([self.columns[name], values]) if self.n else values
+        self.n += lengths.pop() if lengths else 0
+    
+    @classmethod
+    def from_raw_data(cls, raw_data):
+        """Flatten the per variation raw data into columns"""
+        import numpy as np
+        table = cls()
+        chunks = {'variation_id': [], 'success': [], 'query': [], 'trace': [], 'x': [], 'y': []}
+        for data in raw_data.values():
+            for query, traces in enumerate(data.get('data_points') or []):
+                for trace, points in traces.items():
+                    points = np.asarray(points, dtype=np.float64)
+                    if not len(points):
+                        continue
+                    k = len(points)
+                    chunks['variation_id'].append(np.full(k, data.get('variation_id', 0), dtype=np.int64))
+                    chunks['success'].append(np.full(k, bool(data.get('success', False))))
+                    chunks['query'].append(np.full(k, query, dtype=np.int32))
+                    chunks['trace'].append(np.full(k, table.label_code(trace), dtype=np.int32))
+                    chunks['x'].append(points[:, 0])
+                    chunks['y'].append(points[:, 1])
+        if chunks['x']:
+            table.add_rows({name: np.concatenate(parts) for name, parts in chunks.items()})
+        return table
+    
+    def select(self, **conditions):
+        """Columns of the rows whose columns equal the given values"""
+        import numpy as np
+        mask = np.ones(self.n, dtype=bool)
+        for name, value in conditions.items():
+            if name == 'trace':
+                value = self.label_index.get(value, -1)
+            mask &= self.columns[name] == value
+        return {name: values[mask] for name, values in self.columns.items()}
+
+class PlotConfig:
+    """Plot configuration, caching its series resolved against the plotted data"""
+    __slots__ = ('data_source', 'plot_type', 'series', 'title', 'x_label', 'y_label', 'z_label', 'include_seed', '_resolved', '_resolved_key')
+    FIELDS = ('data_source', 'plot_type', 'series', 'title', 'x_label', 'y_label', 'z_label', 'include_seed')
+    
+    def __init__(self, data_source='raw', plot_type='scatter', series=None, title='Plot', x_label='X', y_label='Y', z_label='Z', include_seed=False):
+        self.data_source = data_source
+        self.plot_type = plot_type
+        self.series = series if series is not None else []
+        self.title = title
+        self.x_label = x_label
+        self.y_label = y_label
+        self.z_label = z_label
+        self.include_seed = include_seed
+        self._resolved = None
+        self._resolved_key = None
+    
+    @classmethod
+    def from_dict(cls, config):
+        """Build from a saved configuration dict"""
+        return cls(**{k: config[k] for k in cls.FIELDS if k in config})
+    
+    def to_dict(self):
+        """Plain dict for saving"""
+        return {k: getattr(self, k) for k in self.FIELDS}
+    
+    def set_series(self, series):
+        """Replace the series, dropping the resolved ones if they changed"""
+        if series != self.series:
+            self.series = series
+            self._resolved = None
+    
+    def resolve(self, data, data_source, data_version):
+        """(label, color, x, y, z) per series found in data, cached per data source and version"""
+        key = (data_version, data_source)
+        if self._resolved is None or self._resolved_key != key:
+            self._resolved = []
+            for series in self.series:
+                series_data = data.get(series.get('series_key', ''))
+                if series_data is not None:
+                    self._resolved.append((
+                        series.get('label', ''),
+                        series.get('color', 'blue'),
+                        series_data.get('x', []),
+                        series_data.get('y', []),
+                        series_data.get('z', [])))
+            self._resolved_key = key
+        return self._resolved
 
 class UPPAALExperimentRunner:
+    # Every attribute is declared up front, a typo'd assignment raises instead of adding a field
+    __slots__ = (
+        # Experiment state
+        'root', 'model_file', 'queries_file', '_model_tree', '_model_tree_key', 'results', 'experiment_thread', 'stop_event',
+        'progress_queue', '_poll_interval', 'seed_value', 'num_threads',
+        # Variables
+        'variables', 'declarations', 'user_variables', 'default_variables', '_var_rows', '_decl_keys',
+        '_last_data_sources', '_last_config_names',
+        '_def_ver', '_user_ver', '_merged_ver',
+        # Plotting data
+        'raw_data', 'result_table', 'transform_plot_args', 'transformed_data', 'transformations',
+        '_compiled_transforms', '_jitted', '_transform_pool', '_transform_pool_data', 'plot_configs', '_pending_plot_update', '_cfg_change_id', '_data_version',
+        # Widgets
+        'notebook', 'tabs', 'model_entry', 'queries_entry', 'declaration_var', 'declaration_combo',
+        'declaration_editor', 'declaration_status', 'var_tree', 'start_btn', 'stop_btn', 'clear_btn', 'progress_bar',
+        'status_label', 'results_text', 'transform_listbox', 'transform_name_var', 'transform_name_entry',
+        'jit_transforms_var', 'transform_code', 'transform_status', 'plot_config_var', 'plot_config_combo',
+        'data_source_var', 'data_source_combo', 'plot_type_var', 'plot_type_combo', 'plot_title_var',
+        'include_seed_var', 'x_label_var', 'y_label_var', 'z_label_var', 'series_listbox', '_series_records',
+        'plot_container', 'figure', 'canvas', 'toolbar', '_ax', '_ax_projection', '_ax_plot_type', '_layout_key', '_artists', '_artist_kind', '_drawn_signature', 'plot_status',
+    )
 
     def __init__(self, root):
         self.root = root
@@ -70,19 +388,39 @@ class UPPAALExperimentRunner:
         self.experiment_thread = None
         self.stop_event = threading.Event()
         self.progress_queue = queue.Queue()
+        self._poll_interval = 50  # ms, adapted by check_progress
+        
+        self._model_tree = None
+        self._model_tree_key = None
         
         # Variables
-        self.variables = OrderedDict()
+        self.variables = {}
         self.declarations = {}
-        self.user_variables = OrderedDict()
-        self.default_variables = OrderedDict()
+        self.user_variables = {}
+        self._var_rows = {}  # tree row id -> value currently shown
+        self._decl_keys = None  # declaration names shown in the combo box
+        self._last_data_sources = None  # data sources shown in the plot tab combo box
+        self._last_config_names = None  # plot configuration names shown in the combo box
+        # Bumped whenever defaults or user values change, merge_variables is skipped while they match
+        self._def_ver = 0
+        self._user_ver = 0
+        self._merged_ver = (0, 0)
+        self.default_variables = {}
         
         # Plotting data
         self.raw_data = {}
+        self.result_table = ResultTable()
         self.transform_plot_args = {}
         self.transformed_data = {}
         self.transformations = {}
-        self.plot_configs = OrderedDict()
+        self._compiled_transforms = {}  # name -> (hash of source, code object)
+        self._jitted = {}  # name -> {function code object: numba dispatcher}
+        self._transform_pool = None  # Run All worker processes, see transform_pool
+        self._transform_pool_data = None
+        self.plot_configs = {}
+        self._pending_plot_update = None
+        self._cfg_change_id = None
+        self._data_version = 0  # bumped whenever transformed_data changes
         
         # Settings
         self.seed_value = tk.StringVar(value="0")
@@ -103,16 +441,7 @@ class UPPAALExperimentRunner:
     
     def initialize_default_plot_config(self):
         """Initialize default plot configuration"""
-        self.plot_configs["default"] = {
-            'data_source': 'raw',
-            'plot_type': 'scatter',
-            'series': [],
-            'title': 'Plot',
-            'x_label': 'X',
-            'y_label': 'Y',
-            'z_label': 'Z',
-            'include_seed': False
-        }
+        self.plot_configs["default"] = PlotConfig()
     
     # ==================== UI CREATION ====================
     
@@ -230,6 +559,8 @@ class UPPAALExperimentRunner:
         self.declaration_combo.bind('<<ComboboxSelected>>', self.on_declaration_selected)
         ttk.Button(select_frame, text="Load Declarations", command=self.load_declarations).pack(side=tk.LEFT, padx=5)
         ttk.Button(select_frame, text="Apply Changes", command=self.save_declaration).pack(side=tk.LEFT, padx=5)
+        self.declaration_status = ttk.Label(select_frame, text="", foreground='gray')
+        self.declaration_status.pack(side=tk.LEFT, padx=5)
         
         # Editor
         editor_frame = ttk.LabelFrame(main_container, text="Declaration Code", padding=10)
@@ -335,6 +666,9 @@ class UPPAALExperimentRunner:
         self.transform_name_var = tk.StringVar(value="new_transformation")
         self.transform_name_entry = ttk.Entry(name_frame, textvariable=self.transform_name_var, width=30)
         self.transform_name_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.jit_transforms_var = tk.BooleanVar(value=False)
+        jit_state = 'normal' if importlib.util.find_spec('numba') else 'disabled'
+        ttk.Checkbutton(name_frame, text="JIT compile", variable=self.jit_transforms_var, state=jit_state).pack(side=tk.LEFT, padx=5)
         
         # Code editor with syntax highlighting
         editor_frame = ttk.LabelFrame(right_panel, text="Python Code", padding=10)
@@ -346,7 +680,12 @@ class UPPAALExperimentRunner:
         doc_frame = ttk.LabelFrame(right_panel, text="Transformation Format", padding=10)
         doc_frame.pack(fill=tk.X, pady=(10, 0))
         doc_text = """Transformations set the variable result to a dict on the form:
-• {'series_name': {'x': [1,2,3], 'y': [4,5,6], 'label': 'Series 1'}}"""
+• {'series_name': {'x': [1,2,3], 'y': [4,5,6], 'label': 'Series 1'}}
+Inputs are raw_data (per variation) and table, whose columns are NumPy arrays
+(variation_id, success, query, trace, x, y), e.g. table.select(query=0, trace='[0]'); x and y may be arrays.
+Numeric helpers taking arrays as arguments can be decorated with @jit to compile them with numba (JIT compile).
+Run All runs several transformations in worker processes: result and plot_args must be picklable
+(no generators or lambdas) and changes made to raw_data there are not kept."""
         ttk.Label(doc_frame, text=doc_text, justify=tk.LEFT, font=('Segoe UI', 9), foreground='gray').pack(fill=tk.X)
         
         # Status bar
@@ -398,13 +737,16 @@ class UPPAALExperimentRunner:
         labels_frame.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(labels_frame, text="X-axis Label:").grid(row=0, column=0, sticky=tk.W, pady=2)
         self.x_label_var = tk.StringVar(value="X")
-        ttk.Entry(labels_frame, textvariable=self.x_label_var, validatecommand=self.auto_config_change, width=30).grid(row=0, column=1, padx=5, pady=2, sticky=tk.W)
+        ttk.Entry(labels_frame, textvariable=self.x_label_var, width=30).grid(row=0, column=1, padx=5, pady=2, sticky=tk.W)
         ttk.Label(labels_frame, text="Y-axis Label:").grid(row=1, column=0, sticky=tk.W, pady=2)
         self.y_label_var = tk.StringVar(value="Y")
-        ttk.Entry(labels_frame, textvariable=self.y_label_var, validatecommand=self.auto_config_change, width=30).grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
+        ttk.Entry(labels_frame, textvariable=self.y_label_var, width=30).grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
         ttk.Label(labels_frame, text="Z-axis Label:").grid(row=2, column=0, sticky=tk.W, pady=2)
         self.z_label_var = tk.StringVar(value="Z")
-        ttk.Entry(labels_frame, textvariable=self.z_label_var, validatecommand=self.auto_config_change, width=30).grid(row=2, column=1, padx=5, pady=2, sticky=tk.W)
+        ttk.Entry(labels_frame, textvariable=self.z_label_var, width=30).grid(row=2, column=1, padx=5, pady=2, sticky=tk.W)
+        # validatecommand never fired without validate= and is meant for validation anyway
+        for var in (self.plot_title_var, self.x_label_var, self.y_label_var, self.z_label_var):
+            var.trace_add('write', self.auto_config_change)
 
         
         # Data source
@@ -432,6 +774,7 @@ class UPPAALExperimentRunner:
         series_list_frame = ttk.Frame(series_frame)
         series_list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         self.series_listbox = tk.Listbox(series_list_frame, height=6)
+        self._series_records = []  # series dicts shown in the listbox, row i is record i
         series_scrollbar = ttk.Scrollbar(series_list_frame, orient=tk.VERTICAL, command=self.series_listbox.yview)
         self.series_listbox.configure(yscrollcommand=series_scrollbar.set)
         self.series_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -457,15 +800,111 @@ class UPPAALExperimentRunner:
         
         plot_container = ttk.LabelFrame(right_panel, text="Plot Display", padding=10)
         plot_container.pack(fill=tk.BOTH, expand=True)
-        self.figure = Figure(figsize=(8, 6), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.figure, plot_container)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        self.toolbar = NavigationToolbar2Tk(self.canvas, plot_container)
-        self.toolbar.update()
+        # The figure is created on first plot so startup skips matplotlib
+        self.plot_container = plot_container
+        self.figure = None
+        self.canvas = None
+        self._ax = None
+        self._ax_projection = None
+        self._ax_plot_type = None
+        self._layout_key = None  # figure size, labels, data and limits tight_layout last ran for
+        self._artists = []  # (artist, x, y) per drawn line or scatter series
+        self._artist_kind = None  # (plot type, plot args) the artists were drawn with
+        self._drawn_signature = None  # plot_signature() of the last redraw
         
         self.plot_status = ttk.Label(right_panel, text="No plot data", relief=tk.SUNKEN, anchor=tk.W)
         self.plot_status.pack(fill=tk.X, pady=(10, 0))
     
+    def ensure_plot_canvas(self):
+        """Create the matplotlib figure and canvas on first use"""
+        if self.canvas is not None:
+            return
+        import matplotlib
+        # MPLBACKEND still wins for anyone who wants to try another backend
+        if 'MPLBACKEND' not in os.environ:
+            matplotlib.use('TkAgg')
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=(8, 6), dpi=100)
+        self.canvas = FigureCanvasTkAgg(self.figure, self.plot_container)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.plot_container)
+        self.toolbar.update()
+    
+    def plot_axes(self, projection=None, plot_type=None):
+        """Emptied plot axes, only rebuilt when the projection changes"""
+        self.ensure_plot_canvas()
+        ax = self._ax
+        if ax is None or self._ax_projection != projection:
+            self.figure.clear()
+            ax = self._ax = self.figure.add_subplot(111, projection=projection)
+            self._ax_projection = projection
+            self._layout_key = None
+        elif projection is None and plot_type == self._ax_plot_type and plot_type != "box":
+            # Same kind of plot, drop the data artists but keep ticks, locators and formatters
+            for artist in [*ax.lines, *ax.collections, *ax.patches]:
+                artist.remove()
+            ax.containers.clear()
+            ax.relim()
+            ax.set_autoscale_on(True)
+        else:
+            # Box plots fix the tick labels, anything else after one needs a full reset
+            ax.cla()
+        self._ax_plot_type = plot_type
+        self._artists = []
+        self._artist_kind = None
+        return self._ax
+    
+    def draw_series(self, ax, plot_type, resolved, args):
+        """Draw line or scatter series, updating the artists of the previous draw in place"""
+        import numpy as np
+        from matplotlib.cbook import normalize_kwargs
+        from matplotlib.lines import Line2D
+        artists = self._artists
+        # Line2D markers draw one cached marker path instead of a PathCollection. Scatter is
+        # kept for plot_args a line cannot take, per point colours, sizes, colormaps, ...
+        use_scatter = plot_type == "scatter" and any(k in _SCATTER_ONLY_ARGS or not hasattr(Line2D, f"set_{k}") for k in args)
+        if use_scatter:
+            kwargs = dict(alpha=0.6, s=80, **args)
+        elif plot_type == "scatter":
+            # Same size as s=80, plot_args override the defaults, aliases like ms included
+            kwargs = dict(marker='o', markersize=math.sqrt(80), linestyle='none', alpha=0.6)
+            kwargs.update(normalize_kwargs(args, Line2D))
+        else:
+            kwargs = dict(marker='o', linewidth=2)
+            kwargs.update(normalize_kwargs(args, Line2D))
+        # Per point colours from plot_args replace the series colour
+        colormapped = use_scatter and 'c' in args
+        for i, (label, color, x, y, _) in enumerate(resolved):
+            if i < len(artists):
+                artist, old_x, old_y = artists[i]
+                # Resolved series are cached, unchanged data comes back as the same objects
+                if x is not old_x or y is not old_y:
+                    if use_scatter:
+                        artist.set_offsets(np.column_stack([x, y]))
+                    else:
+                        artist.set_data(x, y)
+                if not colormapped:
+                    artist.set_color(color)
+                artist.set_label(label)
+                artists[i] = (artist, x, y)
+            elif colormapped:
+                artists.append((ax.scatter(x, y, label=label, **kwargs), x, y))
+            elif use_scatter:
+                artists.append((ax.scatter(x, y, color=color, label=label, **kwargs), x, y))
+            else:
+                artists.append((ax.plot(x, y, color=color, label=label, **kwargs)[0], x, y))
+        for artist, _, _ in artists[len(resolved):]:
+            artist.remove()
+        del artists[len(resolved):]
+        # relim only looks at lines and patches, scatter offsets are added by hand
+        ax.relim()
+        if use_scatter:
+            for artist, _, _ in artists:
+                ax.update_datalim(artist.get_offsets())
+        ax.autoscale_view()
+        self._artist_kind = (plot_type, args)
+    
     # ==================== FILE OPERATIONS ====================
     
     def select_model(self):
@@ -500,13 +939,13 @@ class UPPAALExperimentRunner:
                 'seed': self.seed_value.get(),
                 'num_threads': self.num_threads.get(),
                 'transformations': self.transformations,
-                'plot_configs': dict(self.plot_configs),
+                'plot_configs': {name: config.to_dict() for name, config in self.plot_configs.items()},
                 'save_time': datetime.now().isoformat(),
                 'config_version': '1.0'
             }
             
-            with open(filename, 'w') as f:
-                json.dump(config_data, f, indent=2, default=str)
+            with open(filename, 'wb') as f:
+                f.write(_dumps(config_data))
             
             messagebox.showinfo("Success", f"Experiment configuration saved to {filename}")
         except Exception as e:
@@ -524,19 +963,23 @@ class UPPAALExperimentRunner:
             # Load configuration
             self.model_file = config_data.get('model_file')
             self.queries_file = config_data.get('queries_file')
-            self.user_variables = OrderedDict(config_data.get('user_variables', {}))
+            self.user_variables = dict(config_data.get('user_variables', {}))
+            self._user_ver += 1
             self.seed_value.set(config_data.get('seed', '0'))
             self.num_threads.set(config_data.get('num_threads', 1))
             
             # Load transformations
             loaded_transformations = config_data.get('transformations', {})
             self.transformations = {}
+            self._compiled_transforms.clear()
+            self._jitted.clear()
             self.transformed_data = {}
+            self._data_version += 1
             
             for name, code in loaded_transformations.items():
                 self.transformations[name] = code
             
-            self.plot_configs = OrderedDict(config_data.get('plot_configs', {}))
+            self.plot_configs = {name: PlotConfig.from_dict(config) for name, config in config_data.get('plot_configs', {}).items()}
             
             # Update UI
             if self.model_file and os.path.isfile(self.model_file):
@@ -551,7 +994,7 @@ class UPPAALExperimentRunner:
                 self.queries_entry.insert(0, self.queries_file)
                 with open(self.queries_file) as f:
                     self.declarations["Queries File"] = f.read()
-                self.declaration_combo['values'] = list(self.declarations.keys())
+                self.update_declaration_combo()
             else:
                 self.queries_file = None
 
@@ -583,13 +1026,20 @@ class UPPAALExperimentRunner:
         
         try:
             if filename.endswith('.json'):
+                # Arrays are written in binary next to the JSON, which keeps references to them
+                arrays = {}
                 export_data = {
-                    'raw_data': self.raw_data,
-                    'transformed_data': self.transformed_data,
+                    'raw_data': _split_arrays(self.raw_data, 'raw_data', arrays),
+                    'transformed_data': _split_arrays(self.transformed_data, 'transformed_data', arrays),
                     'export_time': datetime.now().isoformat()
                 }
-                with open(filename, 'w') as f:
-                    json.dump(export_data, f, indent=2, default=str)
+                if arrays:
+                    import numpy as np
+                    arrays_file = os.path.splitext(filename)[0] + '.npz'
+                    np.savez_compressed(arrays_file, **arrays)
+                    export_data['arrays_file'] = os.path.basename(arrays_file)
+                with open(filename, 'wb') as f:
+                    f.write(_dumps(export_data))
             elif filename.endswith('.pkl'):
                 export_data = {
                     'raw_data': self.raw_data,
@@ -597,7 +1047,7 @@ class UPPAALExperimentRunner:
                     'export_time': datetime.now().isoformat()
                 }
                 with open(filename, 'wb') as f:
-                    pickle.dump(export_data, f)
+                    pickle.dump(export_data, f, protocol=pickle.HIGHEST_PROTOCOL)
             
             messagebox.showinfo("Success", f"Experiment data exported to {filename}")
         except Exception as e:
@@ -614,6 +1064,15 @@ class UPPAALExperimentRunner:
                 data = json.load(f)
                 self.raw_data = data["raw_data"]
                 self.transformed_data = data["transformed_data"]
+                if "arrays_file" in data:
+                    import numpy as np
+                    with np.load(os.path.join(os.path.dirname(filename), data["arrays_file"])) as npz:
+                        arrays = {k: npz[k] for k in npz.files}
+                    self.raw_data = _join_arrays(self.raw_data, arrays)
+                    self.transformed_data = _join_arrays(self.transformed_data, arrays)
+                self.result_table = ResultTable.from_raw_data(self.raw_data)
+                self._jitted.clear()
+                self._data_version += 1
 
     # ==================== MODEL TAB METHODS ====================
     
@@ -621,31 +1080,31 @@ class UPPAALExperimentRunner:
         """Load declarations from model file"""
         if not self.model_file: return
         
+        from lxml import etree as xml
         try:
-            with open(self.model_file) as f:
-                model = xml.parse(f)
-            
             self.declarations = {}
             
-            # Project declarations
-            project = model.xpath("declaration")
-            if project:
-                self.declarations["project"] = project[0].text or ""
-            
-            # Template declarations
-            templates = model.xpath("template//declaration")
-            for template in templates:
-                parent = template.getparent().xpath("name")
-                if parent:
-                    self.declarations[parent[0].text] = template.text or ""
-            
-            # System declarations
-            system = model.xpath("system")
-            if system:
-                self.declarations["system"] = system[0].text or ""
+            # Stream the model, locations and transitions are never kept around
+            context = xml.iterparse(self.model_file, events=('end',), tag=('declaration', 'template', 'system'))
+            for _, elem in context:
+                parent = elem.getparent()
+                if elem.tag == 'template':
+                    # Done with this template, drop it and everything before it
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del parent[0]
+                elif parent.getparent() is None:
+                    # Project and system declarations
+                    key = "project" if elem.tag == 'declaration' else "system"
+                    self.declarations.setdefault(key, elem.text or "")
+                elif elem.tag == 'declaration':
+                    # Template declarations
+                    name = parent.find("name")
+                    if name is not None:
+                        self.declarations[name.text] = elem.text or ""
             
             self.extract_default_variables()
-            self.declaration_combo['values'] = list(self.declarations.keys())
+            self.update_declaration_combo()
             if self.declarations:
                 self.declaration_combo.current(0)
                 self.on_declaration_selected(None)
@@ -655,38 +1114,30 @@ class UPPAALExperimentRunner:
     
     def extract_default_variables(self):
         """Extract default variables from declarations"""
-        self.default_variables = OrderedDict()
+        default_variables = {}
         
         for section, text in self.declarations.items():
             if not text: continue
             
-            lines = text.splitlines()
-            for line in lines:
-                if "@param" in line:
-                    line = line.split(";")[0]
-                    if "=" in line:
-                        parts = line.split("=", 1)
-                        if len(parts) == 2:
-                            var_part = parts[0].strip()
-                            value = parts[1].strip()
-                            var_name = var_part.split()[-1]
-                            
-                            if section not in self.default_variables:
-                                self.default_variables[section] = OrderedDict()
-                            
-                            self.default_variables[section][var_name] = value
+            for match in process_model.PARAM_RE.finditer(text):
+                default_variables.setdefault(section, {})[match.group(1)] = match.group(2).strip()
         
+        if default_variables != self.default_variables:
+            self.default_variables = default_variables
+            self._def_ver += 1
         self.merge_variables()
         self.load_variables()
     
     def merge_variables(self):
         """Merge default variables with user-modified variables"""
-        self.variables = OrderedDict()
+        if self._merged_ver == (self._def_ver, self._user_ver):
+            return
+        self.variables = {}
         
         # Start with default variables
         for section, vars_dict in self.default_variables.items():
             if section not in self.variables:
-                self.variables[section] = OrderedDict()
+                self.variables[section] = {}
             
             for var_name, default_value in vars_dict.items():
                 if (section in self.user_variables and var_name in self.user_variables[section]):
@@ -697,20 +1148,44 @@ class UPPAALExperimentRunner:
         # Add any user variables not in defaults
         for section, vars_dict in self.user_variables.items():
             if section not in self.variables:
-                self.variables[section] = OrderedDict()
+                self.variables[section] = {}
             
             for var_name, value in vars_dict.items():
                 if var_name not in self.variables[section]:
                     self.variables[section][var_name] = value
+        self._merged_ver = (self._def_ver, self._user_ver)
+    
+    def set_user_variable(self, section, var_name, value):
+        """Record a user value and merge just that variable"""
+        self.user_variables.setdefault(section, {})[var_name] = value
+        in_sync = self._merged_ver == (self._def_ver, self._user_ver)
+        self._user_ver += 1
+        # A user value always wins the merge, so the rest of the merge is unchanged
+        self.variables.setdefault(section, {})[var_name] = value
+        if in_sync:
+            self._merged_ver = (self._def_ver, self._user_ver)
     
     def load_variables(self):
         """Load variables into treeview"""
-        for item in self.var_tree.get_children():
-            self.var_tree.delete(item)
-        
-        for section, vars_dict in self.variables.items():
-            for var_name, value in vars_dict.items():
-                self.var_tree.insert('', tk.END, values=(f"{section}.{var_name}", value))
+        rows = {f"{section}.{var_name}": value
+                for section, vars_dict in self.variables.items()
+                for var_name, value in vars_dict.items()}
+        shown = self._var_rows
+        if not shown:
+            # Prepending in reverse keeps the order without walking to the end on every insert
+            for name, value in reversed(rows.items()):
+                self.var_tree.insert('', 0, iid=name, values=(name, value))
+        else:
+            # Rows are keyed by their full name, only touch the ones that changed
+            stale = shown.keys() - rows.keys()
+            if stale:
+                self.var_tree.delete(*stale)
+            for i, (name, value) in enumerate(rows.items()):
+                if name not in shown:
+                    self.var_tree.insert('', i, iid=name, values=(name, value))
+                elif shown[name] != value:
+                    self.var_tree.item(name, values=(name, value))
+        self._var_rows = rows
     
     def refresh_variables(self):
         """Refresh variables from declarations (preserving user changes)"""
@@ -725,12 +1200,10 @@ class UPPAALExperimentRunner:
         item = self.var_tree.selection()
         if not item: return
         
-        item = item[0]
-        values = self.var_tree.item(item, 'values')
-        if len(values) < 2: return
-        
-        full_name = values[0]
-        current_value = values[1] if len(values) > 1 else ""
+        # Row ids are the full variable names
+        full_name = item[0]
+        if full_name not in self._var_rows: return
+        current_value = self._var_rows[full_name]
         
         # Create edit dialog
         dialog = tk.Toplevel(self.root)
@@ -750,22 +1223,17 @@ class UPPAALExperimentRunner:
         
         def save_changes():
             new_value = new_value_var.get()
-            self.var_tree.item(item, values=(full_name, new_value))
             
             # Update user_variables dictionary
-            if '.' in full_name:
-                section, var_name = full_name.split('.', 1)
-            elif ',' in full_name:
-                section, var_name = full_name.split(',', 1)
-            else:
+            section, sep, var_name = full_name.partition('.')
+            if not sep:
+                section, sep, var_name = full_name.partition(',')
+            if not sep:
                 section = "project"
                 var_name = full_name
             
-            if section not in self.user_variables:
-                self.user_variables[section] = OrderedDict()
-            
-            self.user_variables[section][var_name] = new_value
-            self.merge_variables()
+            self.set_user_variable(section, var_name, new_value)
+            self.load_variables()
             dialog.destroy()
         
         def cancel():
@@ -783,16 +1251,14 @@ class UPPAALExperimentRunner:
         item = self.var_tree.selection()
         if not item: return
         
-        item = item[0]
-        values = self.var_tree.item(item, 'values')
-        if len(values) < 2: return
-        
-        full_name = values[0]
+        # Row ids are the full variable names
+        full_name = item[0]
         if messagebox.askyesno("Confirm", f"Remove variable '{full_name}'?"):
-            section, name = full_name.split(".")
+            section, _, name = full_name.partition(".")
             if section in self.user_variables:
                 if name in self.user_variables[section]:
                     del self.user_variables[section][name]
+                    self._user_ver += 1
                     self.refresh_variables()
     
     # ==================== DECLARATIONS TAB METHODS ====================
@@ -803,11 +1269,18 @@ class UPPAALExperimentRunner:
             messagebox.showwarning("Warning", "No declarations loaded")
             return
         
-        self.declaration_combo['values'] = list(self.declarations.keys())
+        self.update_declaration_combo()
         if self.declarations:
             self.declaration_combo.current(0)
             self.on_declaration_selected(None)
     
+    def update_declaration_combo(self):
+        """Set the declaration choices, skipped while the names are unchanged"""
+        keys = tuple(self.declarations)
+        if keys != self._decl_keys:
+            self.declaration_combo['values'] = keys
+            self._decl_keys = keys
+    
     def on_declaration_selected(self, _):
         """Handle declaration selection"""
         selection = self.declaration_var.get()
@@ -822,34 +1295,41 @@ class UPPAALExperimentRunner:
             messagebox.showwarning("Warning", "No declaration selected")
             return
         
-        path = f"//template[declaration and name/text()='{selection}']//declaration"
         new_text = self.declaration_editor.get(1.0, tk.END).strip()
-        if selection == "project":
-            path = "declaration"
-        elif selection == "System":
-            path = "system"
-        elif selection == "Queries File":
+        if selection == "Queries File":
             with open(self.queries_file, "w") as f:
                 f.write(new_text)
                 self.declarations[selection] = new_text
-                messagebox.showinfo("Saved", f"Declaration '{selection}' updated")
+                self.show_declaration_status(f"Declaration '{selection}' updated")
                 return
             
-        with open(self.model_file, "r") as f:
-            model = xml.parse(f)
-
-        elements = model.xpath(path)
+        model = self.model_tree()
+        # Declarations are loaded under "system", older configs used "System"
+        elements = process_model.find_section(model, "system" if selection == "System" else selection)
         if elements:
             elem = elements[0]
-            if elem.text:
+            if elem.text and elem.text != new_text:
                 elem.text = new_text
-        
-        with open(self.model_file, "w") as f:
-            f.write(xml.tostring(model).decode("UTF-8"))
+                model.write(self.model_file, encoding="UTF-8", xml_declaration=True)
+                self._model_tree_key = (self.model_file, os.path.getmtime(self.model_file))
 
         self.declarations[selection] = new_text
         self.extract_default_variables()
-        messagebox.showinfo("Saved", f"Declaration '{selection}' updated")
+        self.show_declaration_status(f"Declaration '{selection}' updated")
+    
+    def show_declaration_status(self, text):
+        """Acknowledge a save inline instead of with a modal dialog"""
+        self.declaration_status.config(text=text)
+        self.root.after(2000, lambda: self.declaration_status.config(text="") if self.declaration_status.cget('text') == text else None)
+    
+    def model_tree(self):
+        """Parsed model, reparsed only when the file or its modification time changes"""
+        key = (self.model_file, os.path.getmtime(self.model_file))
+        if self._model_tree is None or self._model_tree_key != key:
+            from lxml import etree as xml
+            self._model_tree = xml.parse(self.model_file)
+            self._model_tree_key = key
+        return self._model_tree
     
     # ==================== EXPERIMENTS TAB METHODS ====================
     
@@ -866,15 +1346,8 @@ class UPPAALExperimentRunner:
             return
         
         # Prepare variables for process_model
-        vars_dict = {}
-        for item in self.var_tree.get_children():
-            name, value = self.var_tree.item(item, 'values')
-            section = name.split('.')[0]
-            var_name = name.split('.')[1]
-            
-            if section not in vars_dict:
-                vars_dict[section] = []
-            vars_dict[section].append([var_name, value])
+        vars_dict = {section: [[name, value] for name, value in d.items()]
+                     for section, d in self.variables.items() if d}
         
         if not vars_dict:
             messagebox.showwarning("No Variables", "No variables configured")
@@ -883,43 +1356,56 @@ class UPPAALExperimentRunner:
         # Clear previous results
         self.results_text.delete(1.0, tk.END)
         self.raw_data = {}
+        self.result_table = ResultTable()
         self.transformed_data = {}
+        self._data_version += 1
         self.update_data_sources()
         self.update_transform_list()
         
         # Update UI
+        self.stop_event.clear()
         self.start_btn.config(state='disabled')
         self.stop_btn.config(state='normal')
         self.status_label.config(text="Starting experiments...")
         self.progress_bar['value'] = 0
         
         # Generate variable combinations
-        assignments = process_model.generate_all_assignments(vars_dict)
+        total, assignments = process_model.generate_all_assignments(vars_dict)
 
         # Start thread
         self.experiment_thread = threading.Thread(
             target=self.run_experiment,
-            args=(seed, self.num_threads.get(), assignments),
+            args=(seed, self.num_threads.get(), assignments, total),
             daemon=True
         )
         self.experiment_thread.start()
-        self.progress_queue.put(('progress', 0, len(assignments)))
+        self.progress_queue.put(('progress', 0, total))
     
-    def run_experiment(self, seed, threads, assignments):
-        """Run experiment in background thread"""
+    def run_experiment(self, seed, threads, assignments, total):
+        """Run experiment from a background thread, verifyta output is parsed in worker processes"""
         try:
             def progress_callback(current, total):
                 self.progress_queue.put(('progress', current, total))
             
-            self.results = process_model.run_verification_pipeline(
+            stream = process_model.iter_verification_pipeline(
                 self.model_file,
                 self.queries_file,
                 assignments,
                 seed=seed,
                 threads=threads,
                 timeout=None,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                processes=True,
+                total=total
             )
+            results = {}
+            for key, result in stream:
+                results[key] = result
+                if self.stop_event.is_set():
+                    # Variations that have not started yet are cancelled
+                    stream.close()
+                    break
+            self.results = results
             
             self.progress_queue.put(('complete', self.results))
             
@@ -932,18 +1418,24 @@ class UPPAALExperimentRunner:
         self.status_label.config(text="Stopping...")
     
     def check_progress(self):
-        """Check for progress updates"""
+        """Check for progress updates, polling faster while messages arrive"""
+        drained = 0
+        latest = None
         try:
-            while True:
+            # Bounded per tick so a burst of messages cannot stall the event loop
+            while drained < 500:
                 msg = self.progress_queue.get_nowait()
+                drained += 1
                 
                 if msg[0] == 'progress':
-                    current, total = msg[1], msg[2]
-                    progress = (current / total) * 100 if total > 0 else 0
-                    self.progress_bar['value'] = progress
-                    self.status_label.config(text=f"Processing {current}/{total} variations")
-                    
-                elif msg[0] == 'complete':
+                    # Only the newest progress is worth drawing
+                    latest = msg
+                    continue
+                
+                if latest is not None:
+                    self.show_progress(latest[1], latest[2])
+                    latest = None
+                if msg[0] == 'complete':
                     self.experiment_complete(msg[1])
                     
                 elif msg[0] == 'error':
@@ -955,7 +1447,16 @@ class UPPAALExperimentRunner:
             pass
         
         finally:
-            self.root.after(100, self.check_progress)
+            if latest is not None:
+                self.show_progress(latest[1], latest[2])
+            # Back off exponentially while idle
+            self._poll_interval = 10 if drained else min(self._poll_interval * 2, 200)
+            self.root.after(self._poll_interval, self.check_progress)
+    
+    def show_progress(self, current, total):
+        """Update the progress bar and status label"""
+        self.progress_bar['value'] = (current / total) * 100 if total > 0 else 0
+        self.status_label.config(text=f"Processing {current}/{total} variations")
     
     def experiment_complete(self, results):
         """Handle experiment completion"""
@@ -975,6 +1476,8 @@ class UPPAALExperimentRunner:
     def process_raw_data(self):
         """Process raw results into simple data structure"""
         self.raw_data = {}
+        # numba freezes the globals a jitted helper reads, recompile them against the new data
+        self._jitted.clear()
         
         for key, result in self.results.items():
             if key == 'statistics': continue
@@ -1009,6 +1512,7 @@ class UPPAALExperimentRunner:
                 'formula_satisfaction': formula_satisfaction,
                 'success': result.get('success', False)
             }
+        self.result_table = ResultTable.from_raw_data(self.raw_data)
     
     def display_results(self):
         """Display results in text area"""
@@ -1019,32 +1523,36 @@ class UPPAALExperimentRunner:
             return
         
         stats = self.results.get('statistics', {})
+        buf = []
         
         # Display statistics
-        self.results_text.insert(tk.END, "=" * 60 + "\n")
-        self.results_text.insert(tk.END, "EXPERIMENT RESULTS\n")
-        self.results_text.insert(tk.END, "=" * 60 + "\n\n")
+        buf.append("=" * 60 + "\n")
+        buf.append("EXPERIMENT RESULTS\n")
+        buf.append("=" * 60 + "\n\n")
         
-        self.results_text.insert(tk.END, f"Total variations: {stats.get('total_variations', 0)}\n")
-        self.results_text.insert(tk.END, f"Successful runs: {stats.get('successful_runs', 0)}\n")
-        self.results_text.insert(tk.END, f"Failed runs: {stats.get('failed_runs', 0)}\n")
-        self.results_text.insert(tk.END, f"Random seed: {stats.get('seed_used', 'N/A')}\n")
-        self.results_text.insert(tk.END, f"Threads used: {stats.get('threads_used', 'N/A')}\n\n")
+        buf.append(f"Total variations: {stats.get('total_variations', 0)}\n")
+        buf.append(f"Successful runs: {stats.get('successful_runs', 0)}\n")
+        buf.append(f"Failed runs: {stats.get('failed_runs', 0)}\n")
+        buf.append(f"Random seed: {stats.get('seed_used', 'N/A')}\n")
+        buf.append(f"Threads used: {stats.get('threads_used', 'N/A')}\n\n")
         
         # Display each variation
-        self.results_text.insert(tk.END, "-" * 60 + "\n")
-        self.results_text.insert(tk.END, "VARIATION DETAILS\n")
-        self.results_text.insert(tk.END, "-" * 60 + "\n\n")
+        buf.append("-" * 60 + "\n")
+        buf.append("VARIATION DETAILS\n")
+        buf.append("-" * 60 + "\n\n")
         
         for var_id, data in self.raw_data.items():
-            self.results_text.insert(tk.END, f"Variation {var_id}:\n")
-            self.results_text.insert(tk.END, f"  Label: {data['label']}\n")
-            self.results_text.insert(tk.END, f"  Status: {'SUCCESS' if data['success'] else 'FAILED'}\n")
-            self.results_text.insert(tk.END, f"  Formulas satisfied: {data['formula_satisfaction']}\n")
+            buf.append(f"Variation {var_id}:\n")
+            buf.append(f"  Label: {data['label']}\n")
+            buf.append(f"  Status: {'SUCCESS' if data['success'] else 'FAILED'}\n")
+            buf.append(f"  Formulas satisfied: {data['formula_satisfaction']}\n")
             if data['data_points']:
                 for data_point in data['data_points']:
-                    self.results_text.insert(tk.END, f"  Data variables: {', '.join(data_point.keys())}\n")
-            self.results_text.insert(tk.END, "\n")
+                    buf.append(f"  Data variables: {', '.join(data_point.keys())}\n")
+            buf.append("\n")
+        
+        # One insert instead of a Tcl round trip per line
+        self.results_text.insert(tk.END, "".join(buf))
     
     def copy_results(self):
         """Copy results to clipboard"""
@@ -1065,22 +1573,24 @@ class UPPAALExperimentRunner:
         text = scrolledtext.ScrolledText(dialog, height=20, font=('Consolas', 9))
         text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        text.insert(tk.END, f"RAW DATA SUMMARY\n")
-        text.insert(tk.END, "=" * 50 + "\n\n")
-        text.insert(tk.END, f"Total variations: {len(self.raw_data)}\n")
-        text.insert(tk.END, f"Successful runs: {sum(1 for d in self.raw_data.values() if d.get('success', False))}\n\n")
+        buf = []
+        buf.append(f"RAW DATA SUMMARY\n")
+        buf.append("=" * 50 + "\n\n")
+        buf.append(f"Total variations: {len(self.raw_data)}\n")
+        buf.append(f"Successful runs: {sum(1 for d in self.raw_data.values() if d.get('success', False))}\n\n")
         
-        text.insert(tk.END, "VARIATION SUMMARY:\n")
-        text.insert(tk.END, "-" * 40 + "\n")
+        buf.append("VARIATION SUMMARY:\n")
+        buf.append("-" * 40 + "\n")
         
         for var_id, data in self.raw_data.items():
-            text.insert(tk.END, f"Variation {var_id}:\n")
-            text.insert(tk.END, f"  Label: {data.get('label', 'N/A')}\n")
-            text.insert(tk.END, f"  Status: {'SUCCESS' if data.get('success', False) else 'FAILED'}\n\n")
+            buf.append(f"Variation {var_id}:\n")
+            buf.append(f"  Label: {data.get('label', 'N/A')}\n")
+            buf.append(f"  Status: {'SUCCESS' if data.get('success', False) else 'FAILED'}\n\n")
             data_points = data.get('data_points', [])
             for data_point in data_points:
                 for trace, data in data_point.items():
-                    text.insert(tk.END,f"{trace} {data}")
+                    buf.append(f"{trace} {data}")
+        text.insert(tk.END, "".join(buf))
         
         text.configure(state='disabled')
         
@@ -1092,10 +1602,14 @@ class UPPAALExperimentRunner:
         """Clear all results"""
         self.results = None
         self.raw_data = {}
+        self.result_table = ResultTable()
         self.transformed_data = {}
+        self._data_version += 1
         self.results_text.delete(1.0, tk.END)
-        self.figure.clear()
-        self.canvas.draw()
+        if self.canvas is not None:
+            self.figure.clear()
+            self._ax = None
+            self.canvas.draw_idle()
         self.update_data_sources()
         self.update_transform_list()
         self.status_label.config(text="Ready")
@@ -1112,7 +1626,7 @@ class UPPAALExperimentRunner:
     def save_transformation(self):
         """Save current transformation"""
         name = self.transform_name_var.get().strip()
-        code = self.transform_code.get(1.0, tk.END).strip()
+        code = self.transform_code.text().strip()
         
         if not name:
             messagebox.showwarning("Warning", "Please enter a transformation name")
@@ -1143,6 +1657,8 @@ class UPPAALExperimentRunner:
         if messagebox.askyesno("Confirm", f"Remove transformation '{name}'?"):
             if name in self.transformations:
                 del self.transformations[name]
+            self._compiled_transforms.pop(name, None)
+            self._jitted.pop(name, None)
             if name in self.transformed_data:
                 del self.transformed_data[name]
             self.update_transform_list()
@@ -1198,39 +1714,130 @@ class UPPAALExperimentRunner:
         progress_bar.pack(padx=20, pady=(0, 20), fill=tk.X)
         progress_dialog.update()
         
-        # Run each transformation
-        success_count = 0
-        current_data_source = self.data_source_var.get()
-        should_update_plot = False
+        total = len(self.transformations)
+        pending = {}
+        failed = 0
+        if total == 1:
+            # Starting a worker would cost more than a single transformation saves
+            for name, code in self.transformations.items():
+                future = Future()
+                try:
+                    future.set_result(self.run_transformation_here(name, code))
+                except Exception as e:
+                    future.set_exception(e)
+                pending[future] = name
+        else:
+            # Transformations are independent, run them side by side in worker processes
+            # while the dialog keeps the event loop going
+            codes = {}
+            for name, code in self.transformations.items():
+                try:
+                    codes[name] = self.compile_transformation(name, code)
+                except Exception as e:
+                    print(f"Error in transformation '{name}': {e}")
+                    failed += 1
+            # The verifyta results are only sent along when a transformation reads them
+            uses_results = any(_code_uses(code, 'results') for code in codes.values())
+            pool = self.transform_pool(self.results if uses_results else None)
+            use_jit = self.jit_transforms_var.get()
+            for name, code in codes.items():
+                pending[pool.submit(_run_transformation, marshal.dumps(code), use_jit)] = name
         
-        for i, (name, code) in enumerate(self.transformations.items()):
-            try:
-                if self.execute_transformation(name, code, silent=True):
-                    success_count += 1
-                    if name == current_data_source:
-                        should_update_plot = True
-            except Exception as e:
-                print(f"Error in transformation '{name}': {e}")
+        current_data_source = self.data_source_var.get()
+        state = {'success': 0, 'failed': failed, 'update_plot': False}
+        
+        def poll():
+            for future in [f for f in pending if f.done()]:
+                name = pending.pop(future)
+                try:
+                    result, plot_args = future.result()
+                except Exception as e:
+                    print(f"Error in transformation '{name}': {e}")
+                    state['failed'] += 1
+                    continue
+                if result is None:
+                    state['failed'] += 1
+                    continue
+                self.transformed_data[name] = result
+                self._data_version += 1
+                if plot_args is not None:
+                    self.transform_plot_args[name] = plot_args
+                state['success'] += 1
+                if name == current_data_source:
+                    state['update_plot'] = True
+            progress_var.set(state['success'] + state['failed'])
+            if pending:
+                self.root.after(50, poll)
+                return
             
-            progress_var.set(i + 1)
-            progress_dialog.update()
-        
-        progress_dialog.destroy()
-        self.update_transform_list()
-        self.update_data_sources()
-        
-        # AUTO-UPDATE PLOT IF CURRENT DATA SOURCE WAS EXECUTED
-        if should_update_plot and self.notebook.tab(self.notebook.select(), "text") == "Plot":
-            self.auto_update_plot()
+            progress_dialog.destroy()
+            self.update_transform_list()
+            self.update_data_sources()
+            
+            # AUTO-UPDATE PLOT IF CURRENT DATA SOURCE WAS EXECUTED
+            if state['update_plot'] and self.notebook.tab(self.notebook.select(), "text") == "Plot":
+                self.auto_update_plot()
+            
+            messagebox.showinfo("Complete", f"Ran {total} transformations\nSuccess: {state['success']}\nFailed: {total - state['success']}")
+            self.transform_status.config(text=f"Ran all transformations ({state['success']} successful)")
         
-        messagebox.showinfo("Complete", f"Ran {len(self.transformations)} transformations\nSuccess: {success_count}\nFailed: {len(self.transformations) - success_count}")
-        self.transform_status.config(text=f"Ran all transformations ({success_count} successful)")
+        poll()
         
     def execute_current_transformation(self):
         name = self.transform_name_var.get().strip()
-        code = self.transform_code.get(1.0, tk.END)
+        # The same string object comes back while unedited, so its hash is cached too
+        code = self.transform_code.text()
         self.execute_transformation(name, code)
     
+    def compile_transformation(self, name, code):
+        """Compile transformation code, reusing the code object while the source is unchanged"""
+        h = hash(code)
+        entry = self._compiled_transforms.get(name)
+        if entry is None or entry[0] != h:
+            entry = (h, compile(code, f'<transform:{name}>', 'exec'))
+            self._compiled_transforms[name] = entry
+            self._jitted.pop(name, None)
+        return entry[1]
+    
+    def jit_decorator(self, name):
+        """The jit decorator given to a transformation, compiling with numba when enabled"""
+        def jit(func):
+            if not self.jit_transforms_var.get():
+                return func
+            jitted = self._jitted.setdefault(name, {})
+            # The function's code object is reused while the source is unchanged
+            if func.__code__ not in jitted:
+                from numba import njit
+                jitted[func.__code__] = njit(fastmath=True)(func)
+            return jitted[func.__code__]
+        return jit
+    
+    def run_transformation_here(self, name, code):
+        """Run a transformation in this process, returning (result, plot_args)"""
+        namespace = dict(_transform_namespace(),
+            raw_data=self.raw_data,
+            table=self.result_table,
+            jit=self.jit_decorator(name),
+            results=self.results)
+        exec(self.compile_transformation(name, code), namespace)
+        return namespace.get("result"), namespace.get("plot_args")
+    
+    def transform_pool(self, results):
+        """Worker processes holding the current data, kept across runs while the data is the same"""
+        data = (self.raw_data, self.result_table, results)
+        if self._transform_pool is None or any(a is not b for a, b in zip(data, self._transform_pool_data)):
+            if self._transform_pool is not None:
+                # Runs already submitted still finish
+                self._transform_pool.shutdown(wait=False)
+            # Spawned on demand, each worker receives the data once
+            self._transform_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_transform_worker,
+                initargs=data)
+            self._transform_pool_data = data
+        return self._transform_pool
+    
     def execute_transformation(self, name, code,  silent=False):
         """Execute transformation code"""
         if not self.raw_data and not silent:
@@ -1245,27 +1852,10 @@ class UPPAALExperimentRunner:
         self.transformations[name] = code
         # plot_args = {"meanline": True}
         try:
-            safe_globals = {
-                'raw_data': self.raw_data,
-                'results': self.results,
-                'np': np,
-                'math': __import__('math'),
-                'statistics': __import__('statistics'),
-                'json': json,
-                'list': list,
-                'range': range,
-                'dict': dict
-            }
-            
-            exec(code, safe_globals)
-            result = None
-            plot_args = None
-            if "result" in safe_globals:
-                result = safe_globals["result"]
-            if "plot_args" in safe_globals:
-                plot_args = safe_globals["plot_args"]
+            result, plot_args = self.run_transformation_here(name, code)
             if result is not None:
                 self.transformed_data[name] = result
+                self._data_version += 1
                 if plot_args is not None:
                     self.transform_plot_args[name] = plot_args
                 if not silent:
@@ -1353,16 +1943,7 @@ class UPPAALExperimentRunner:
                 messagebox.showwarning("Warning", f"Configuration '{name}' already exists")
                 return
             
-            self.plot_configs[name] = {
-                'data_source': 'raw',
-                'plot_type': 'scatter',
-                'series': [],
-                'title': 'Plot',
-                'x_label': 'X',
-                'y_label': 'Y',
-                'z_label': 'Z',
-                'include_seed': False
-            }
+            self.plot_configs[name] = PlotConfig()
             
             self.update_plot_configs_list()
             self.plot_config_var.set(name)
@@ -1386,32 +1967,23 @@ class UPPAALExperimentRunner:
         if not name or name not in self.plot_configs:
             return
         
-        config = {
+        config = self.plot_configs[name]
+        fields = {
             'data_source': self.data_source_var.get(),
             'plot_type': self.plot_type_var.get(),
-            'series': [],
             'title': self.plot_title_var.get(),
             'x_label': self.x_label_var.get(),
             'y_label': self.y_label_var.get(),
             'z_label': self.z_label_var.get(),
-            'include_seed': self.include_seed_var.get()
+            'include_seed': self.include_seed_var.get(),
         }
+        if self._series_records == config.series and all(getattr(config, k) == v for k, v in fields.items()):
+            return
+        for k, v in fields.items():
+            setattr(config, k, v)
         
-        for i in range(self.series_listbox.size()):
-            series_str = self.series_listbox.get(i)
-            if ' | ' in series_str:
-                parts = series_str.split(' | ')
-                if len(parts) >= 5:
-                    series = {
-                        'label': parts[0],
-                        'x_array': parts[1],
-                        'y_array': parts[2],
-                        'color': parts[3],
-                        'series_key': parts[4] if len(parts) > 4 else ''
-                    }
-                    config['series'].append(series)
-        
-        self.plot_configs[name] = config
+        # Copies, so later edits to the records do not leak into the saved config
+        config.set_series([dict(series) for series in self._series_records])
         self.plot_status.config(text=f"Configuration '{name}' auto-saved")
     
     def rename_plot_config(self):
@@ -1467,11 +2039,41 @@ class UPPAALExperimentRunner:
         dialog.bind('<Return>', lambda e: rename())
         dialog.bind('<Escape>', lambda e: cancel())
     
-    def auto_config_change(self, _=None):
+    def auto_config_change(self, *_):
         """Handle configuration changes by auto-saving and auto-updating"""
+        # Any number of changes before Tk goes idle are applied once
+        if self._cfg_change_id is None:
+            self._cfg_change_id = self.root.after_idle(self._apply_config_change)
+        return True
+    
+    def _apply_config_change(self):
+        """Save the plot configuration and schedule a redraw"""
+        self._cfg_change_id = None
         self.auto_save_plot_config()
         if self.notebook.tab(self.notebook.select(), "text") == "Plot":
-            self.auto_update_plot()
+            # Collapse bursts of changes (e.g. typing a label) into one redraw
+            if self._pending_plot_update is not None:
+                self.root.after_cancel(self._pending_plot_update)
+            self._pending_plot_update = self.root.after(150, self._run_pending_plot_update)
+    
+    def _run_pending_plot_update(self):
+        """Run the debounced plot update"""
+        self._pending_plot_update = None
+        # Changes that cancel out (e.g. typing and deleting a character) need no redraw
+        if self._ax is not None and self.plot_signature() == self._drawn_signature:
+            return
+        self.auto_update_plot()
+    
+    def plot_signature(self):
+        """Everything the current plot depends on, compared to skip redundant redraws"""
+        name = self.plot_config_var.get()
+        config = self.plot_configs.get(name)
+        if config is None:
+            return None
+        # The selected source, config.data_source only changes when the config is saved
+        data_source = self.data_source_var.get()
+        return (name, config.to_dict(), data_source, self.seed_value.get(), self._data_version,
+                self.transform_plot_args.get(data_source))
     
     def auto_update_plot(self):
         """Automatically update plot with current configuration"""
@@ -1490,7 +2092,6 @@ class UPPAALExperimentRunner:
                 args = self.transform_plot_args[data_source]
             else:
                 args = {}
-            self.figure.clear()
             plot_type = self.plot_type_var.get()
             
             base_title = self.plot_title_var.get()
@@ -1502,64 +2103,52 @@ class UPPAALExperimentRunner:
             x_label = self.x_label_var.get()
             y_label = self.y_label_var.get()
             z_label = self.z_label_var.get()
-            x_vals = []
-            y_vals = []
-            z_vals = []
-            labels = []
-            colors = []
-            if plot_type == "3d": 
-                ax = self.figure.add_subplot(111,projection="3d")
-            else: 
-                ax = self.figure.add_subplot(111)
-            if self.series_listbox.size() == 0:
+            # Line and scatter plots keep their artists between redraws of the same kind
+            kind = self._artist_kind
+            if (self._ax is not None and plot_type in ("line", "scatter") and kind is not None
+                    and kind[0] == plot_type and (kind[1] is args or not (kind[1] or args))):
+                ax = self._ax
+            else:
+                ax = self.plot_axes("3d" if plot_type == "3d" else None, plot_type)
+            config = self.plot_configs.get(self.plot_config_var.get())
+            if config is None or not config.series:
                 messagebox.showerror("Error", "No series selected")
-            for i in range(self.series_listbox.size()):
-                series_str = self.series_listbox.get(i)
-                parts = series_str.split(' | ')
-                
-                if len(parts) < 5: continue
-                label, _, _, color, series_key = parts[0], parts[1], parts[2], parts[3], parts[4]
-                
-                if series_key in data:
-                    series_data = data[series_key]
-                    x_vals.append(series_data.get('x', []))
-                    y_vals.append(series_data.get('y', []))
-                    z_vals.append(series_data.get('z', []))
-                    if len(x_vals) == 0 or len(y_vals) == 0: 
-                        messagebox.showwarning("Warning", f"Series {series_key} has no data (X len: {len(x_vals)}, Y len {len(y_vals)})")
-                    labels.append(label)
-                    colors.append(color)
+            # Series are looked up in the data once per data version, not per redraw
+            resolved = config.resolve(data, data_source, self._data_version) if config else []
             try:
+                # One dispatch on the plot type, the series are walked inside each branch
                 if (plot_type == "box"):
-                    ax.boxplot(y_vals, tick_labels=x_vals, **args)
+                    ax.boxplot([y for _, _, _, y, _ in resolved], tick_labels=[x for _, _, x, _, _ in resolved], **args)
                 elif (plot_type == "histogram"):
-                    ax.hist(y_vals, bins=20, alpha=0.7, color='blue', edgecolor='black')
+                    ax.hist([y for _, _, _, y, _ in resolved], bins=20, alpha=0.7, color='blue', edgecolor='black')
                 elif (plot_type == "3d"):
-                    x = np.array(x_vals)
-                    y = np.array(y_vals)
-                    z = np.array(z_vals)
-                    ax.plot_trisurf(x[0],y[0],z[0], **args)
+                    if resolved:
+                        _, _, x, y, z = resolved[0]
+                        ax.plot_trisurf(x, y, z, **args)
+                elif plot_type in ("line", "scatter"):
+                    self.draw_series(ax, plot_type, resolved, args)
+                elif (plot_type == "bar"):
+                    for l, c, x, y, _ in resolved:
+                        ax.bar(x, y, color=c, label=l, alpha=0.7, **args)
                 else:
-                    for x, y, z, c, l in zip(x_vals, y_vals, z_vals, colors, labels):
-                        if (plot_type == "scatter"):
-                            ax.scatter(x, y, color=c, label=l, alpha=0.6, s=80,**args)
-                        elif (plot_type == "line"):
-                            ax.plot(x, y, color=c, label=l, marker='o', linewidth=2,**args)
-                        elif (plot_type == "bar"):
-                            ax.bar(x, y, color=c, label=l, alpha=0.7,**args)
-                        else:
-                            self.plot_status.config(text=f"Error creating box plot: {str(e)}")
-                            return
+                    raise ValueError(f"Unknown plot type {plot_type!r}")
             except Exception as e:
-                self.plot_status.config(text=f"Error creating box plot: {str(e)}")
+                self.plot_status.config(text=f"Error creating {plot_type} plot: {str(e)}")
             ax.set_title(title)
             ax.set_xlabel(x_label)
             ax.set_ylabel(y_label)
             if z_label and plot_type == "3d":
                 ax.set_zlabel(z_label)
             
-            self.figure.tight_layout()
-            self.canvas.draw()
+            # Layout only moves when the figure size or the text around the axes changes,
+            # tick labels follow the data and the axis limits
+            layout = (tuple(self.figure.get_size_inches()), plot_type, title, x_label, y_label, z_label,
+                      data_source, self._data_version, ax.get_xlim(), ax.get_ylim())
+            if layout != self._layout_key:
+                self.figure.tight_layout()
+                self._layout_key = layout
+            self.canvas.draw_idle()
+            self._drawn_signature = self.plot_signature()
             
             from datetime import datetime
             timestamp = datetime.now().strftime("%H:%M:%S")
@@ -1590,29 +2179,50 @@ class UPPAALExperimentRunner:
         if name in self.plot_configs:
             config = self.plot_configs[name]
             
-            self.data_source_var.set(config.get('data_source', 'raw'))
-            self.plot_type_var.set(config.get('plot_type', 'scatter'))
-            self.plot_title_var.set(config.get('title', 'Plot'))
-            self.x_label_var.set(config.get('x_label', 'X'))
-            self.y_label_var.set(config.get('y_label', 'Y'))
-            self.z_label_var.set(config.get('z_label', 'Z'))
-            self.include_seed_var.set(config.get('include_seed', False))
+            self.data_source_var.set(config.data_source)
+            self.plot_type_var.set(config.plot_type)
+            self.plot_title_var.set(config.title)
+            self.x_label_var.set(config.x_label)
+            self.y_label_var.set(config.y_label)
+            self.z_label_var.set(config.z_label)
+            self.include_seed_var.set(config.include_seed)
             
-            self.series_listbox.delete(0, tk.END)
-            for series in config.get('series', []):
-                label = series.get('label', '')
-                x_array = series.get('x_array', '')
-                y_array = series.get('y_array', '')
-                color = series.get('color', 'blue')
-                series_key = series.get('series_key', '')
-                series_str = f"{label} | {x_array} | {y_array} | {color} | {series_key}"
-                self.series_listbox.insert(tk.END, series_str)
+            self.clear_series()
+            self.extend_series([{
+                'label': series.get('label', ''),
+                'x_array': series.get('x_array', ''),
+                'y_array': series.get('y_array', ''),
+                'color': series.get('color', 'blue'),
+                'series_key': series.get('series_key', '')} for series in config.series])
             
             self.auto_update_plot()
     
+    @staticmethod
+    def format_series(series):
+        """Listbox row of a series record, for display only"""
+        return f"{series['label']} | {series['x_array']} | {series['y_array']} | {series['color']} | {series['series_key']}"
+    
+    def append_series(self, series):
+        """Add a series record and its listbox row"""
+        self._series_records.append(series)
+        self.series_listbox.insert(tk.END, self.format_series(series))
+    
+    def extend_series(self, records):
+        """Add several series records with one listbox insert"""
+        self._series_records.extend(records)
+        self.series_listbox.insert(tk.END, *map(self.format_series, records))
+    
+    def clear_series(self):
+        """Drop all series records and listbox rows"""
+        self._series_records.clear()
+        self.series_listbox.delete(0, tk.END)
+    
     def update_plot_configs_list(self):
         """Update plot configurations combo box"""
-        self.plot_config_combo['values'] = list(self.plot_configs.keys())
+        names = tuple(self.plot_configs)
+        if names != self._last_config_names:
+            self.plot_config_combo['values'] = names
+            self._last_config_names = names
     
     def add_series_dialog(self):
         """Open dialog to add a new series with array selection"""
@@ -1661,7 +2271,7 @@ class UPPAALExperimentRunner:
         update_preview()
         
         ttk.Label(dialog, text="Series Label:").pack(anchor=tk.W, padx=20)
-        label_var = tk.StringVar(value=f"Series {self.series_listbox.size() + 1}")
+        label_var = tk.StringVar(value=f"Series {len(self._series_records) + 1}")
         ttk.Entry(dialog, textvariable=label_var, width=40).pack(padx=20, pady=(0, 10))
         
         ttk.Label(dialog, text="Color:").pack(anchor=tk.W, padx=20)
@@ -1679,11 +2289,10 @@ class UPPAALExperimentRunner:
                 messagebox.showwarning("Warning", "Please enter a series label")
                 return
             
-            series_str = f"{label} | x | y | {color} | {selected_series}"
-            self.series_listbox.insert(tk.END, series_str)
+            self.append_series({'label': label, 'x_array': 'x', 'y_array': 'y', 'color': color, 'series_key': selected_series})
             dialog.destroy()
-            self.auto_update_plot()
             self.auto_save_plot_config()
+            self.auto_update_plot()
         
         def cancel():
             dialog.destroy()
@@ -1715,67 +2324,55 @@ class UPPAALExperimentRunner:
         
         colors = ["blue", "red", "green", "orange", "purple", "brown", "pink", "gray", "cyan", "magenta", "navy", "maroon", "olive", "teal", "coral"]
         
-        if self.series_listbox.size() > 0:
+        if self._series_records:
             if not messagebox.askyesno("Confirm", "Clear existing series before adding all?"):
                 return
-            self.series_listbox.delete(0, tk.END)
+            self.clear_series()
         
-        series_names = list(data.keys())
-        series_names = [name for name in series_names if not name.startswith('_')]
+        series_names = [name for name in data if name[:1] != '_']
         
         if not series_names:
             messagebox.showwarning("No Series", "No valid series found to add")
             return
         
-        # Show progress dialog for large datasets
-        if len(series_names) > 10:
-            progress_dialog = tk.Toplevel(self.root)
-            progress_dialog.title("Adding Series")
-            progress_dialog.transient(self.root)
-            progress_dialog.resizable(False, False)
-            ttk.Label(progress_dialog, text=f"Adding {len(series_names)} series...", font=('Segoe UI', 10)).pack(pady=(20, 10))
-            progress_var = tk.DoubleVar()
-            progress_bar = ttk.Progressbar(progress_dialog, variable=progress_var, maximum=len(series_names), mode='determinate')
-            progress_bar.pack(padx=20, pady=(0, 20), fill=tk.X)
-            progress_dialog.update()
-        
+        records = []
         for i, series_name in enumerate(series_names):
             series_data = data[series_name]
-            label = series_data.get('label', series_name)
-            color = series_data.get('color', colors[i % len(colors)])
-            series_str = f"{label} | x | y | {color} | {series_name}"
-            self.series_listbox.insert(tk.END, series_str)
-            
-            if len(series_names) > 10:
-                progress_var.set(i + 1)
-                progress_dialog.update()
-        
-        if len(series_names) > 10:
-            progress_dialog.destroy()
+            records.append({
+                'label': series_data.get('label', series_name),
+                'x_array': 'x',
+                'y_array': 'y',
+                'color': series_data.get('color', colors[i % len(colors)]),
+                'series_key': series_name})
+        # A single listbox insert, fast enough that no progress dialog is needed
+        self.extend_series(records)
         
         self.plot_status.config(text=f"Added {len(series_names)} series")
-        self.auto_update_plot()
         self.auto_save_plot_config()
+        self.auto_update_plot()
     
     def remove_series(self):
         """Remove selected series"""
         selection = self.series_listbox.curselection()
         if selection:
+            del self._series_records[selection[0]]
             self.series_listbox.delete(selection[0])
             self.auto_save_plot_config()
             self.auto_update_plot()
     
     def remove_all_series(self):
         """Remove all series from the plot"""
-        if self.series_listbox.size() == 0:
+        if not self._series_records:
             messagebox.showinfo("No Series", "No series to remove")
             return
         
-        if messagebox.askyesno("Confirm", f"Remove all {self.series_listbox.size()} series?"):
-            self.series_listbox.delete(0, tk.END)
+        if messagebox.askyesno("Confirm", f"Remove all {len(self._series_records)} series?"):
+            self.clear_series()
             self.plot_status.config(text="All series removed")
-            self.figure.clear()
-            self.canvas.draw()
+            if self.canvas is not None:
+                self.figure.clear()
+                self._ax = None
+                self.canvas.draw_idle()
             self.auto_save_plot_config()
     
     def edit_series_dialog(self):
@@ -1785,11 +2382,8 @@ class UPPAALExperimentRunner:
             messagebox.showinfo("No Selection", "Please select a series to edit")
             return
         
-        series_str = self.series_listbox.get(selection[0])
-        parts = series_str.split(' | ')
-        
-        if len(parts) < 5:
-            return
+        index = selection[0]
+        series = self._series_records[index]
         
         data_source = self.data_source_var.get()
         if data_source not in self.transformed_data:
@@ -1806,16 +2400,16 @@ class UPPAALExperimentRunner:
         
         ttk.Label(dialog, text="Edit Data Series", font=('Segoe UI', 10, 'bold')).pack(pady=(15, 10))
         ttk.Label(dialog, text="Select Series:").pack(anchor=tk.W, padx=20)
-        series_var = tk.StringVar(value=parts[4] if len(parts) > 4 else '')
+        series_var = tk.StringVar(value=series['series_key'])
         series_combo = ttk.Combobox(dialog, textvariable=series_var, values=available_series, state='readonly', width=40)
         series_combo.pack(padx=20, pady=(0, 10))
         
         ttk.Label(dialog, text="Series Label:").pack(anchor=tk.W, padx=20)
-        label_var = tk.StringVar(value=parts[0])
+        label_var = tk.StringVar(value=series['label'])
         ttk.Entry(dialog, textvariable=label_var, width=40).pack(padx=20, pady=(0, 10))
         
         ttk.Label(dialog, text="Color:").pack(anchor=tk.W, padx=20)
-        color_var = tk.StringVar(value=parts[3] if len(parts) > 3 else 'blue')
+        color_var = tk.StringVar(value=series['color'])
         color_combo = ttk.Combobox(dialog, textvariable=color_var, width=20,
                                 values=["blue", "red", "green", "orange", "purple", "brown", "pink", "gray", "cyan", "magenta"])
         color_combo.pack(padx=20, pady=(0, 15))
@@ -1829,9 +2423,10 @@ class UPPAALExperimentRunner:
                 messagebox.showwarning("Warning", "Please enter a series label")
                 return
             
-            series_str = f"{label} | x | y | {color} | {selected_series}"
-            self.series_listbox.delete(selection[0])
-            self.series_listbox.insert(selection[0], series_str)
+            edited = {'label': label, 'x_array': 'x', 'y_array': 'y', 'color': color, 'series_key': selected_series}
+            self._series_records[index] = edited
+            self.series_listbox.delete(index)
+            self.series_listbox.insert(index, self.format_series(edited))
             dialog.destroy()
             self.auto_save_plot_config()
             self.auto_update_plot()
@@ -1849,9 +2444,11 @@ class UPPAALExperimentRunner:
     
     def update_data_sources(self):
         """Update data source dropdown"""
-        sources = []
-        sources.extend(self.transformed_data.keys())
-        self.data_source_combo['values'] = sources
+        sources = tuple(self.transformed_data)
+        # Only hand Tk a new list when the sources actually changed
+        if sources != self._last_data_sources:
+            self.data_source_combo['values'] = sources
+            self._last_data_sources = sources
         
         current = self.data_source_var.get()
         if current not in sources and sources:
@@ -1862,6 +2459,8 @@ class UPPAALExperimentRunner:
         if self.experiment_thread and self.experiment_thread.is_alive():
             self.stop_event.set()
             self.experiment_thread.join(timeout=1.0)
+        if self._transform_pool is not None:
+            self._transform_pool.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
     
     # ==================== TAB METHODS ====================
@@ -1869,10 +2468,8 @@ class UPPAALExperimentRunner:
     def on_tab_changed(self, _):
         """Handle tab change event"""
         current_tab = self.notebook.tab(self.notebook.select(), "text")
-        if current_tab == "Transform":
-            if hasattr(self, 'transform_code') and isinstance(self.transform_code, SyntaxHighlightingText):
-                self.transform_code._highlight()
-        elif current_tab == "Plot":
+        # The code editor highlights itself on <<Modified>> and when its view changes
+        if current_tab == "Plot":
             self.auto_config_change()
  
 def main():
@@ -3,35 +3,43 @@ import subprocess
 import re
 import tempfile
 import itertools
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import multiprocessing
 import os
-from lxml import etree as xml
+import shutil
+import threading
 
+_RANGE_RE = re.compile(r'range\((\d+),\s*(\d+)(?:,\s*(\d+))?\)')
+_LIST_RE = re.compile(r'list\((.*?)\)')
+# "type name = value;" on a line tagged @param, the value stops at the first ';'
+PARAM_RE = re.compile(r"^(?=[^\n]*@param)[^\n;=]*?([^\s;=]+)[ \t]*=[ \t]*([^;\n]*)", re.MULTILINE)
+
+@functools.lru_cache(maxsize=4096)
 def parse_variable_definition(var_def):
-    """Parse variable definition into list of values"""
+    """Parse variable definition into a tuple of values"""
     if 'range' in var_def:
-        try:
-            match = re.search(r'range\((\d+),\s*(\d+)(?:,\s*(\d+))?\)', var_def)
-            if match:
-                start = int(match.group(1))
-                end = int(match.group(2))
-                step = int(match.group(3)) if match.group(3) else 1
-                return list(range(start, end, step))
-        except:
-            return []
+        match = _RANGE_RE.search(var_def)
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2))
+            step = int(match.group(3)) if match.group(3) else 1
+            try:
+                return tuple(range(start, end, step))
+            except ValueError:
+                # A step of 0
+                return ()
     elif 'list' in var_def:
-        try:
-            match = re.search(r'list\((.*?)\)', var_def)
-            if match:
-                return [v.strip() for v in match.group(1).split(',')]
-        except:
-            pass
+        match = _LIST_RE.search(var_def)
+        if match:
+            return tuple(v.strip() for v in match.group(1).split(','))
     
     # Comma-separated values
-    return [v.strip() for v in var_def.split(',') if v.strip()]
+    return tuple(v.strip() for v in var_def.split(',') if v.strip())
 
 def generate_all_assignments(variables):
-    """Generate all variable assignments"""
+    """Count and lazily generate all variable assignments, returns (total, iterator)"""
     options = []
     
     for section, var_list in variables.items():
@@ -40,18 +48,39 @@ def generate_all_assignments(variables):
             options.append([(section, var, v) for v in values])
     
     if not options:
-        return []
+        return 0, iter(())
     
-    # Cartesian product
-    return [list(comb) for comb in itertools.product(*options)]
+    # Cartesian product, produced as the variations are written
+    return math.prod(len(o) for o in options), (list(comb) for comb in itertools.product(*options))
+
+_XPATHS = {}
+
+def compiled_xpath(expr):
+    """Compiled XPath for expr, built once per expression"""
+    xpath = _XPATHS.get(expr)
+    if xpath is None:
+        from lxml import etree as xml
+        xpath = _XPATHS[expr] = xml.XPath(expr)
+    return xpath
 
-def generate_model_variations(model_content, assignments):
-    """Create model files for each assignment"""
-    temp_files = []
+def find_section(tree, section):
+    """Declaration elements of a section: project, system or a template name"""
+    if section == "project":
+        return compiled_xpath("declaration")(tree)
+    if section == "system":
+        return compiled_xpath("system")(tree)
+    # The name is bound as a variable instead of being pasted into the expression
+    return compiled_xpath("//template[declaration and name/text()=$name]//declaration")(tree, name=section)
+
+def generate_model_variations(model_content, assignments, directory):
+    """Create a model file for each assignment in directory, yielding (path, assignment) as they are written"""
+    from lxml import etree as xml
+    # Parsed once, variations only swap the text of the declarations they assign
+    tree = xml.fromstring(model_content.encode())
+    sections = {}  # section -> (declaration element, original text), None if it has none
+    patterns = {}  # frozenset of variable names -> substitution pattern
     
     for i, assignment in enumerate(assignments):
-        tree = xml.fromstring(model_content.encode())
-        
         # Group by section
         by_section = {}
         for section, var, val in assignment:
@@ -60,159 +89,202 @@ def generate_model_variations(model_content, assignments):
             by_section[section].append((var, val))
         
         # Replace in each section
+        touched = []
         for section, vars_list in by_section.items():
-            if section == "project":
-                path = "declaration"
-            elif section == "system":
-                path = "system"
-            else:
-                path = f"//template[declaration and name/text()='{section}']//declaration"
-            
-            elements = tree.xpath(path)
-            if elements:
-                elem = elements[0]
-                if elem.text:
-                    for var, val in vars_list:
-                        pattern = rf"{var}\s*=\s*[^;]*;"
-                        replacement = f"{var} = {val};"
-                        elem.text = re.sub(pattern, replacement, elem.text, flags=re.MULTILINE)
-        # Save to temp file
-        with tempfile.NamedTemporaryFile(mode='w', suffix=f'_var_{i}.xml', delete=False) as f:
-            f.write(xml.tostring(tree).decode("UTF-8"))
-            temp_files.append(f.name)
+            if section not in sections:
+                elements = find_section(tree, section)
+                sections[section] = (elements[0], elements[0].text) if elements else None
+            if sections[section] is None:
+                continue
+            elem, text = sections[section]
+            if text:
+                # One pass over the declaration for all of its variables
+                values = dict(vars_list)
+                names = frozenset(values)
+                pattern = patterns.get(names)
+                if pattern is None:
+                    # Longest names first, so a name is never matched by one of its prefixes
+                    alternatives = '|'.join(re.escape(var) for var in sorted(names, key=len, reverse=True))
+                    pattern = patterns[names] = re.compile(rf"({alternatives})\s*=\s*[^;]*;", re.MULTILINE)
+                elem.text = pattern.sub(lambda m: f"{m.group(1)} = {values[m.group(1)]};", text)
+                touched.append(section)
+        # Numbered names in a private directory, no search for a free name per file
+        path = os.path.join(directory, f'var_{i}.xml')
+        with open(path, 'wb') as f:
+            f.write(xml.tostring(tree, encoding='UTF-8', xml_declaration=True))
+        for section in touched:
+            elem, text = sections[section]
+            elem.text = text
+        yield path, assignment
+
+# verifyta output: "(t, v)" samples of a trace and the per formula verdicts
+_POINT_RE = re.compile(r'\(([^,]+),\s*([^)]+)\)')
+_FORMULA_RE = re.compile(r'Verifying formula (\d+)')
+# Matched against stripped lines, so without verifyta's leading space
+_SAT_MARKER = '-- Formula is satisfied'
+_UNSAT_MARKER = '-- Formula is not satisfied'
+
+def _parse_verifyta_stdout(lines):
+    """Parse verifyta output lines into (data_points, formulas)"""
+    # Imported here so the GUI does not load numpy just by importing this module
+    import numpy as np
+    data_points = []
+    formulas = []
+    # Formular index
+    fidx = -1
     
-    return temp_files
+    for line in lines:
+        line = line.strip()
+        if line.startswith("(") and line.endswith(":"):
+            fidx += 1
+            data_points.append({})
+        # Data points
+        if line.startswith("["):
+            parts = line.split(':', 1)
+            if len(parts) == 2:
+                var = parts[0].strip()
+                points_str = parts[1].strip()
+                
+                # Parse (t, v) pairs into one (N, 2) array, a non numeric sample fails the variation
+                matches = _POINT_RE.findall(points_str)
+                if matches:
+                    data_points[fidx][var] = np.array(matches, dtype=np.float64)
+        
+        # Formula verification
+        elif (match := _FORMULA_RE.search(line)):
+            formulas.append({
+                'number': match.group(1),
+                'satisfied': None
+            })
+        
+        elif _SAT_MARKER in line and formulas:
+            formulas[-1]['satisfied'] = True
+        
+        elif _UNSAT_MARKER in line and formulas:
+            formulas[-1]['satisfied'] = False
+    return data_points, formulas
 
-def run_verifyta_single(model_file, query_file, seed, timeout):
-    """Run verifyta on a single model"""
+def _parse_verifyta_output(text):
+    """Parse the whole verifyta output, picklable for a worker process"""
+    return _parse_verifyta_stdout(text.splitlines())
+
+def run_verifyta_single(model_file, query_file, seed, timeout, parse_pool=None):
+    """Run verifyta on a single model, parsing its output in parse_pool if given"""
     cmd = ["verifyta"]
     if seed != 0:
         cmd.extend(["--seed", str(seed)])
     cmd.extend([model_file, query_file])
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-        
-        # Parse output
-        data_points = []
-        formulas = []
-        # Formular index
-        fidx = -1
-
-        lines = result.stdout.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith("(") and line.endswith(":"):
-                fidx += 1
-                data_points.append({})
-            # Data points
-            if line.startswith("["):
-                parts = line.split(':', 1)
-                if len(parts) == 2:
-                    var = parts[0].strip()
-                    points_str = parts[1].strip()
-                    
-                    # Parse (t, v) pairs
-                    points = []
-                    matches = re.findall(r'\(([^,]+),\s*([^)]+)\)', points_str)
-                    for t, v in matches:
-                        try:
-                            t_val = float(t) if '.' in t else int(t)
-                            v_val = float(v) if '.' in v else int(v)
-                            points.append((t_val, v_val))
-                        except:
-                            points.append((t, v))
-                    if points:
-                        data_points[fidx][var] = points
-            
-            # Formula verification
-            elif 'Verifying formula' in line:
-                match = re.search(r'Verifying formula (\d+)', line)
-                if match:
-                    formulas.append({
-                        'number': match.group(1),
-                        'satisfied': None
-                    })
-            
-            elif ' -- Formula is satisfied' in line and formulas:
-                formulas[-1]['satisfied'] = True
-            
-            elif ' -- Formula is not satisfied' in line and formulas:
-                formulas[-1]['satisfied'] = False
-        #print("number of queries: " + len(data_points))
-        return {
-            'success': result.returncode == 0,
-            'stderr': result.stderr,
-            'data_points': data_points,
-            'formulas': formulas,
-            'return_code': result.returncode
-        }
+        # stdout is parsed while verifyta runs, stderr goes to a file so a full pipe cannot block it
+        with tempfile.TemporaryFile(mode='w+') as err, \
+                subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True) as proc:
+            timed_out = threading.Event()
+            def kill():
+                timed_out.set()
+                proc.kill()
+            timer = threading.Timer(timeout, kill) if timeout else None
+            if timer:
+                timer.start()
+            try:
+                if parse_pool is None:
+                    data_points, formulas = _parse_verifyta_stdout(proc.stdout)
+                else:
+                    output = proc.stdout.read()
+                return_code = proc.wait()
+            finally:
+                if timer:
+                    timer.cancel()
+            if timed_out.is_set():
+                return {'success': False, 'error': 'Timeout'}
+            if parse_pool is not None:
+                data_points, formulas = parse_pool.submit(_parse_verifyta_output, output).result()
+            err.seek(0)
+            return {
+                'success': return_code == 0,
+                'stderr': err.read(),
+                'data_points': data_points,
+                'formulas': formulas,
+                'return_code': return_code
+            }
     
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'error': 'Timeout'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
-def run_verification_pipeline(model_file, query_file, assignments, seed=0, threads=4, timeout=None, progress_callback=None):
-    """Main pipeline to run all experiments"""
+def iter_verification_pipeline(model_file, query_file, assignments, seed=0, threads=4, timeout=None, progress_callback=None, processes=False, total=None):
+    """Run all experiments, yielding ("variation_<id>", result) as each variation completes
+
+    verifyta runs in threads, its output is parsed in worker processes if processes
+    is set. assignments may be any
+    iterable when total gives its length. Closing the generator early cancels the
+    variations that have not started yet"""
     # Read model
     with open(model_file) as f:
         model_content = f.read()
     
-    if not assignments:
-        return {}
+    if total is None:
+        total = len(assignments)
+    if not total:
+        return
     
-    print(f"Running {len(assignments)} variations...")
+    print(f"Running {total} variations...")
     
-    # Create model variations
-    temp_files = generate_model_variations(model_content, assignments)
-    
-    results = {}
+    # Every variation is written here and removed together at the end
+    tmpdir = tempfile.mkdtemp(prefix='uppaal_var_')
     
     try:
-        # Run in parallel
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            futures = {}
-            for i, (model_file, assignment) in enumerate(zip(temp_files, assignments)):
-                future = executor.submit(run_verifyta_single, model_file, query_file, seed, timeout)
-                futures[future] = (i, assignment)
-            
-            # Collect results
-            for i, future in enumerate(as_completed(futures)):
-                var_id, assignment = futures[future]
-                try:
-                    result = future.result(timeout=timeout)
+        # Run in parallel, threads only wait on verifyta
+        parse_pool = None
+        if processes:
+            # Parsing is CPU bound, so one worker per core at most. Spawned workers,
+            # forking a process that runs a GUI thread is not safe
+            parse_pool = ProcessPoolExecutor(max_workers=min(threads, os.cpu_count() or 1),
+                                             mp_context=multiprocessing.get_context("spawn"))
+        executor = ThreadPoolExecutor(max_workers=threads)
+        with executor:
+            try:
+                futures = {}
+                # Variations are written as they are submitted, the first runs start right away
+                for i, (model_file, assignment) in enumerate(generate_model_variations(model_content, assignments, tmpdir)):
+                    future = executor.submit(run_verifyta_single, model_file, query_file, seed, timeout, parse_pool)
+                    futures[future] = (i, assignment)
+                
+                # Collect results, as_completed only hands out finished futures
+                for done, future in enumerate(as_completed(futures), 1):
+                    var_id, assignment = futures[future]
+                    if progress_callback:
+                        progress_callback(done, total)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error in variation {var_id}: {e}")
+                        continue
                     
                     # Add assignment info
                     result['variation_id'] = var_id
                     result['assignment'] = assignment
                     
                     # Create summary
-                    satisfied = sum(1 for f in result.get('formulas', []) if f.get('satisfied'))
+                    formulas = result.get('formulas', [])
                     result['summary'] = {
                         'satisfied_formulas': [{
                             'formula': f.get('number'),
                             'satisfied': f.get('satisfied')
-                        } for f in result.get('formulas', [])],
-                        'satisfied_count': satisfied
+                        } for f in formulas],
+                        'satisfied_count': sum(1 for f in formulas if f.get('satisfied'))
                     }
                     
-                    results[f"variation_{var_id}"] = result
-                    
-                    # Update progress
-                    if progress_callback:
-                        progress_callback(i + 1, len(assignments))
-                    
-                except Exception as e:
-                    print(f"Error in variation {var_id}: {e}")
-        
-        return results
+                    yield f"variation_{var_id}", result
+            finally:
+                # Only matters when the caller stopped early, queued variations are dropped
+                executor.shutdown(cancel_futures=True)
+                if parse_pool is not None:
+                    parse_pool.shutdown()
     
     finally:
         # Cleanup
-        for f in temp_files:
-            try:
-                os.unlink(f)
-            except:
-                pass
\ No newline at end of file
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def run_verification_pipeline(model_file, query_file, assignments, seed=0, threads=4, timeout=None, progress_callback=None, processes=False, total=None):
+    """Main pipeline to run all experiments, returns the results keyed by variation"""
+    return dict(iter_verification_pipeline(model_file, query_file, assignments, seed, threads, timeout, progress_callback, processes, total))
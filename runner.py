@@ -1,15 +1,187 @@
 import argparse
+import io
+import os
+import zipfile
 from lxml import etree
 import pprint
 import itertools
+import functools
+import math
 import process_model
 import numpy as np
-import matplotlib.pyplot as plt
 import simdjson
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+try:
+    import orjson
+    
+    def _dumps(obj):
+        # Bytes straight from C, NumPy arrays included
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def _dumps(obj):
+        # Traces are (N, 2) arrays, written out as nested lists
+        return simdjson.dumps(obj, default=np.ndarray.tolist).encode()
 
 def get_var_val(assignment, section, name):
-    return list(filter(lambda x: x[0] == section and x[1] == name, assignment))[0][2]
+    for s, n, v in assignment:
+        if s == section and n == name:
+            return v
+    raise KeyError(f"{section}.{name}")
+
+def _group_last_values_kernel(bucket_ids, last_vals, n_buckets):
+    # Pass 1: per bucket counts and moments
+    counts = np.zeros(n_buckets, dtype=np.int64)
+    sums = np.zeros(n_buckets, dtype=np.float64)
+    sum_sq = np.zeros(n_buckets, dtype=np.float64)
+    for i in range(bucket_ids.shape[0]):
+        b = bucket_ids[i]
+        v = last_vals[i]
+        counts[b] += 1
+        sums[b] += v
+        sum_sq[b] += v * v
+    offsets = np.zeros(n_buckets + 1, dtype=np.int64)
+    for b in range(n_buckets):
+        offsets[b + 1] = offsets[b] + counts[b]
+    # Pass 2: scatter values into contiguous per bucket slabs
+    packed = np.empty(last_vals.shape[0], dtype=last_vals.dtype)
+    fill = offsets[:-1].copy()
+    for i in range(bucket_ids.shape[0]):
+        b = bucket_ids[i]
+        packed[fill[b]] = last_vals[i]
+        fill[b] += 1
+    return counts, sums, sum_sq, offsets, packed
+
+def _group_last_values_numpy(bucket_ids, last_vals, n_buckets):
+    counts = np.bincount(bucket_ids, minlength=n_buckets)
+    sums = np.bincount(bucket_ids, weights=last_vals, minlength=n_buckets)
+    sum_sq = np.bincount(bucket_ids, weights=last_vals.astype(np.float64) ** 2, minlength=n_buckets)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    packed = last_vals[np.argsort(bucket_ids, kind='stable')]
+    return counts, sums, sum_sq, offsets, packed
+
+@functools.cache
+def _group_last_values_impl():
+    # numba is imported on first use, the spawned verifyta parse workers re-import this module
+    try:
+        from numba import njit
+    except ImportError:
+        return _group_last_values_numpy
+    # Without the GIL, grouping runs alongside the threads saving earlier figures
+    return njit(cache=True, nogil=True)(_group_last_values_kernel)
+
+# Bucket sort (bucket id, value) pairs, returns (counts, sums, sum_sq, offsets, packed)
+# where bucket b's values are packed[offsets[b]:offsets[b+1]]
+def group_last_values(bucket_ids, last_vals, n_buckets):
+    # The compiled kernel does no bounds checks, ids from an older run could write past the buckets
+    if len(bucket_ids) and (bucket_ids.min() < 0 or bucket_ids.max() >= n_buckets):
+        raise ValueError(
+            f"Bucket ids range over [{bucket_ids.min()}, {bucket_ids.max()}] but only {n_buckets} buckets were given, "
+            "the experiment data may come from a run with different parameters")
+    return _group_last_values_impl()(bucket_ids, last_vals, n_buckets)
+
+# Column layout of the experiment data, one row per trace last value
+@dataclass
+class ExperimentArrays:
+    variation_ids: np.ndarray      # (V,) variation id
+    success: np.ndarray            # (V,) verifyta success flag
+    params: dict                   # "section.name" -> (V,) assigned values
+    variation_offsets: np.ndarray  # (V+1,) rows of variation i are [offsets[i], offsets[i+1])
+    query_ids: np.ndarray          # (N,) query index of each row
+    last_values: np.ndarray        # (N,) last value of each trace
+    skipped: list = field(default_factory=list)  # keys of variations whose traces could not be read, not saved
+
+    # Broadcast a per variation column to one entry per row
+    def per_row(self, values):
+        return np.repeat(values, np.diff(self.variation_offsets))
+
+def build_soa(data):
+    variation_ids = []
+    success = []
+    params = {}
+    counts = []
+    query_ids = []
+    last_values = []
+    skipped = []
+    # Keys and indexing, items() and values() would convert simdjson proxies in full
+    for key in data.keys():
+        var = data[key]
+        if 'assignment' not in var:
+            continue
+        rows_q = []
+        rows_v = []
+        try:
+            for qid, traces in enumerate(var.get('data_points') or []):
+                last = [t[-1][1] for t in (traces[name] for name in traces.keys()) if len(t)]
+                if last:
+                    rows_v.append(np.array(last, dtype=np.float64).astype(np.float32))
+                    rows_q.append(np.full(len(last), qid, dtype=np.int32))
+        except (ValueError, IndexError, TypeError):
+            skipped.append(key)
+            rows_q, rows_v = [], []
+        for section, name, value in var['assignment']:
+            params.setdefault(f"{section}.{name}", []).append(value)
+        variation_ids.append(var.get('variation_id', -1))
+        success.append(bool(var.get('success')))
+        counts.append(sum(len(v) for v in rows_v))
+        query_ids.extend(rows_q)
+        last_values.extend(rows_v)
+    return ExperimentArrays(
+        variation_ids=np.array(variation_ids, dtype=np.int64),
+        success=np.array(success, dtype=bool),
+        params={k: np.asarray(v) for k, v in params.items()},
+        variation_offsets=np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+        query_ids=np.concatenate(query_ids) if query_ids else np.empty(0, dtype=np.int32),
+        last_values=np.concatenate(last_values) if last_values else np.empty(0, dtype=np.float32),
+        skipped=skipped)
+
+def source_stat(source):
+    # Size and mtime in ns, a copy keeping the mtime of an older file still differs in one of them
+    st = os.stat(source)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+def save_soa(arrays, path, source=None):
+    # With source, the summary records which out.data it was built from
+    extra = {"source_stat": source_stat(source)} if source is not None else {}
+    np.savez(path,
+        variation_ids=arrays.variation_ids,
+        success=arrays.success,
+        variation_offsets=arrays.variation_offsets,
+        query_ids=arrays.query_ids,
+        last_values=arrays.last_values,
+        **{f"param:{k}": v for k, v in arrays.params.items()},
+        **extra)
+
+def load_soa(path):
+    with np.load(path) as f:
+        return ExperimentArrays(
+            variation_ids=f['variation_ids'],
+            success=f['success'],
+            params={k[len("param:"):]: f[k] for k in f.files if k.startswith("param:")},
+            variation_offsets=f['variation_offsets'],
+            query_ids=f['query_ids'],
+            last_values=f['last_values'])
+
+def summary_matches(path, source):
+    # Whether the summary at path was built from source as it is now
+    if not os.path.exists(path):
+        return False
+    with np.load(path) as f:
+        return "source_stat" in f.files and np.array_equal(f["source_stat"], source_stat(source))
+
+def load_summary(experiment_data, data=None):
+    # Reuse the columns cached next to out.data while it is the file they were built from
+    path = experiment_data + "out.npz"
+    source = experiment_data + "out.data"
+    if summary_matches(path, source):
+        return load_soa(path)
+    if data is None:
+        data = simdjson.Parser().load(source)
+    arrays = build_soa(data)
+    save_soa(arrays, path, source)
+    return arrays
 
 def main(args):
     globals = {
@@ -22,13 +194,23 @@ def main(args):
         'plots': [],
         'export_plots': None,
         'extensions': [],
+        'export_archive': False,
         'get_var_val': get_var_val,
+        'group_last_values': group_last_values,
+        'load_summary': load_summary,
         'np': np,
-        'plt': plt
     }
+    # The config runs in every mode, so plt is there even when nothing is drawn
+    import matplotlib
+    if not args.plot:
+        # Figures are saved from worker threads, keep them off the GUI backend
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    globals['plt'] = plt
     
     with open(args.config) as f:
-        code = f.read()
+        # Compiled under its own file name, so tracebacks point into the config
+        code = compile(f.read(), args.config, "exec")
     
     exec(code, globals)
     
@@ -40,78 +222,138 @@ def main(args):
     if args.run:
         if globals['model'] != None and globals['queries'] != None and globals["experiment_data"]:
             Path(globals["experiment_data"]).mkdir(parents=True, exist_ok=True)
+            total, assignments = get_assignments(globals["vars"])
             raw = process_model.run_verification_pipeline(
                 globals["model"],
                 globals["queries"],
-                get_assignments(globals["vars"]),
+                assignments,
                 globals["seed"],
-                globals["threads"])
-            with open(globals["experiment_data"] + "out.data", "w") as f:
-                f.write(simdjson.dumps(raw))
+                globals["threads"],
+                # verifyta runs in threads, its output is parsed in worker processes instead of under one GIL
+                processes=True,
+                total=total)
+            with open(globals["experiment_data"] + "out.data", "wb") as f:
+                f.write(_dumps(raw))
+            # Plots only read the last value of each trace, keep those at hand
+            arrays = build_soa(raw)
+            save_soa(arrays, globals["experiment_data"] + "out.npz", globals["experiment_data"] + "out.data")
+            if arrays.skipped:
+                print(f"Skipped {len(arrays.skipped)} variations with unreadable traces: {', '.join(map(str, arrays.skipped))}")
     if args.plot or args.export:
         if globals["experiment_data"] != None:
-            with open(globals["experiment_data"] + "out.data") as f:
-                data = simdjson.loads(f.read())
+            # Lazy proxies, plots only convert the fields they read. The parser
+            # owns the document, so it is kept alive while the plots are drawn
+            parser = simdjson.Parser()
+            data = parser.load(globals["experiment_data"] + "out.data")
+            archive = globals["export_archive"]
+            extensions = globals["extensions"] if args.export else []
+            # Each figure is independent, so they can be written concurrently. Only Agg
+            # figures are, GUI backed figures are saved on this thread while it draws
+            workers = max(1, min(len(globals["plots"]), os.cpu_count() or 1))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                submit = _run_now if args.plot else pool.submit
+                saves = []
                 for plot, kw in globals["plots"]:
                     fig, ax = plt.subplots(subplot_kw=kw)
                     plot(ax, data)
-                    if args.export and len(globals["extensions"]):
-                        for ex in globals["extensions"]:
-                            plt.savefig(globals["experiment_data"] + ax.get_title().replace(" ", "_") +f".{ex}", format=ex)
+                    if len(extensions):
+                        # Title read once per figure, each extension only appends a suffix
+                        name = ax.get_title().replace(" ", "_")
+                        if archive:
+                            saves.append((name, fig, submit(render_figure, fig, extensions)))
+                        else:
+                            path = globals["experiment_data"] + name
+                            saves.append((name, fig, submit(save_figure, fig, path, extensions)))
+                if archive and saves:
+                    # One sequential write instead of a file per plot and extension
+                    with zipfile.ZipFile(globals["experiment_data"] + "plots.zip", "w", zipfile.ZIP_STORED) as zf:
+                        for name, fig, save in saves:
+                            for ex, payload in save.result():
+                                zf.writestr(f"{name}.{ex}", payload)
+                            if not args.plot:
+                                plt.close(fig)
+                else:
+                    for _, fig, save in saves:
+                        save.result()
+                        # Figures are only kept around to be shown
+                        if not args.plot:
+                            plt.close(fig)
                 if args.plot:
                     plt.show()
 
+def _run_now(fn, *args):
+    # Runs fn on the calling thread, returning its outcome as a finished future
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def save_figure(fig, path, extensions):
+    for ex in extensions:
+        fig.savefig(f"{path}.{ex}", format=ex)
+
+def render_figure(fig, extensions):
+    rendered = []
+    for ex in extensions:
+        buf = io.BytesIO()
+        fig.savefig(buf, format=ex)
+        rendered.append((ex, buf.getvalue()))
+    return rendered
+
 def get_sections(model):
-    with open(model) as f:
-        model = etree.parse(f)
-    # Project declarations
-    project = model.xpath("declaration")
-    sections = {}
-    if project:
-        sections["project"] = project[0].text or ""
+    project = system = None
+    templates = {}
+    # One streaming pass, top level elements are dropped as soon as they are read
+    for _, elem in etree.iterparse(model, events=("end",), tag=("declaration", "system", "template")):
+        parent = elem.getparent()
+        top = parent.getparent() is None
+        if elem.tag == "declaration":
+            if top:
+                # Project declarations
+                if project is None:
+                    project = elem.text or ""
+            elif next(elem.iterancestors("template"), None) is not None:
+                # Template declarations, named by the name next to them
+                name = parent.find("name")
+                if name is not None:
+                    templates[name.text] = elem.text or ""
+        elif elem.tag == "system" and top:
+            # System declarations
+            if system is None:
+                system = elem.text or ""
+        if top:
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
     
-    # Template declarations
-    templates = model.xpath("template//declaration")
-    for template in templates:
-        parent = template.getparent().xpath("name")
-        if parent:
-            sections[parent[0].text] = template.text or ""
-    
-    # System declarations
-    system = model.xpath("system")
-    if system:
-        sections["system"] = system[0].text or ""
+    sections = {}
+    if project is not None:
+        sections["project"] = project
+    sections.update(templates)
+    if system is not None:
+        sections["system"] = system
     return sections
 
 def get_params(sections):
     vars = {}
     for section, code in sections.items():
-        if section not in vars:
-            vars[section] = {}
-        for line in code.splitlines():
-            if "@param" in line:
-                line = line.split(";")[0]
-                if "=" in line:
-                    parts = line.split("=", 1)
-                    if len(parts) == 2:
-                        var_part = parts[0].strip()
-                        value = parts[1].strip()
-                        var_name = var_part.split()[-1]
-                        vars[section][var_name] = value
-    return {k: v for k, v in vars.items() if v}
+        # One scan per section for the "name = value;" lines tagged @param
+        params = {m.group(1): m.group(2).strip() for m in process_model.PARAM_RE.finditer(code)}
+        if params:
+            vars[section] = params
+    return vars
 
 def get_assignments(vars):
-    options = []
-    for section, var_list in vars.items():
-        for var, val in var_list.items():
-            if type(val) != str:
-                options.append([(section, var, v) for v in val])
-            else:
-                options.append([(section, var, val)])
+    # A string is one fixed value, anything else is iterated for the values to sweep
+    options = [[(section, var, v) for v in ((val,) if isinstance(val, str) else val)]
+               for section, var_list in vars.items() for var, val in var_list.items()]
     if not options:
-        return []
-    # Cartesian product
-    return [list(comb) for comb in itertools.product(*options)]
+        return 0, iter(())
+    # Cartesian product, produced as the pipeline writes the variations. The
+    # (section, name, value) tuples are shared between all combinations
+    return math.prod(len(o) for o in options), (list(comb) for comb in itertools.product(*options))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -34,46 +34,27 @@ experiment_data = "/home/lokew/Documents/code/UPPAAL-Experiment-Runner/output_sl
 plots = []
 extensions = ["svg", "eps"]
 
+def load_columns(data):
+    # One row per trace last value, with the parameters of its variation
+    arrays = load_summary(experiment_data, data)
+    timeslot = arrays.params["project.TIMESLOT"].astype(np.int64)
+    bitstuffing = arrays.params["project.Bitstuffing"].astype(np.int64)
+    return arrays, timeslot, bitstuffing
+
 def get_error_per_timeslot(ax, data, TARGET_QUERY_ID = 0, TARGET_BITSTUFFING = 8, MIN_TIMESLOT = 15, X_OFFSET=2):
     if not data:
         raise ValueError("No experiment data available.")
 
     print(f"Processing {len(data)} variations for box plots...")
 
-    # Group by timeslot value first
-    grouped_data = {}  # key: timeslot value, value: list of last values
-    # Process each variation
-    for var_id, data in data.items():
-        if not data.get('success', False):
-            continue
-        assignment = data.get('assignment', {})
-        timeslot = get_var_val(assignment, "project", "TIMESLOT")
-        bitstuffing = get_var_val(assignment, "project", "Bitstuffing")
-        if bitstuffing != TARGET_BITSTUFFING:
-            continue
-        if timeslot < MIN_TIMESLOT:
-            continue
-        
-        # Initialize group if not exists
-        if timeslot not in grouped_data:
-            grouped_data[timeslot] = []
-        # Extract last values from all traces
-        data_points = data.get('data_points', {})
-        data_points = data_points[TARGET_QUERY_ID]
-        for _, points in data_points.items():
-            if points:
-                try:
-                    last_value = float(points[-1][1])
-                    grouped_data[timeslot].append(last_value)
-                except (ValueError, IndexError, TypeError):
-                    continue
-
-    # Convert to plot-ready format
-    X = []
-    Y = []
-    for timeslot, values in sorted(grouped_data.items()):
-        X.append(timeslot)
-        Y.append(values)
+    arrays, timeslot, bitstuffing = load_columns(data)
+    keep = arrays.success & (bitstuffing == TARGET_BITSTUFFING) & (timeslot >= MIN_TIMESLOT)
+    mask = arrays.per_row(keep) & (arrays.query_ids == TARGET_QUERY_ID)
+
+    # Group by timeslot value, X is sorted
+    X, group = np.unique(arrays.per_row(timeslot)[mask], return_inverse=True)
+    _, _, _, offsets, packed = group_last_values(group, arrays.last_values[mask], len(X))
+    Y = [packed[offsets[i]:offsets[i + 1]] for i in range(len(X))]
     ax.boxplot(Y, tick_labels=X)
 
 def get_3d_error(ax, data, TARGET_QUERY_ID = 0, MIN_TIMESLOT = 30, Y_OFFSET= 2):
@@ -82,30 +63,30 @@ def get_3d_error(ax, data, TARGET_QUERY_ID = 0, MIN_TIMESLOT = 30, Y_OFFSET= 2):
     if not data:
         raise ValueError("No experiment data available.")
 
-    # Group by timeslot value first
-    x_vals = []
-    y_vals = []
-    z_vals = []
-    # Process each variation
-    for _, data in data.items():
-        if not data.get('success', False):
-            continue
-        assignment = data.get('assignment', {})
-        timeslot = get_var_val(assignment, "project", "TIMESLOT")
-        bitstuffing = get_var_val(assignment, "project", "Bitstuffing")
-        if timeslot < MIN_TIMESLOT:
-            continue
-        
-        # Extract last values from all traces
-        data_points = data.get('data_points', {})
-        data_points = data_points[TARGET_QUERY_ID]
-        t_z = []
-        for _, points in data_points.items():
-            t_z.append(float(points[-1][1]))
-        x_vals.append(timeslot)
-        y_vals.append(bitstuffing+Y_OFFSET)
-        from statistics import mean
-        z_vals.append(mean(t_z))
+    arrays, timeslot, bitstuffing = load_columns(data)
+    keep = arrays.success & (timeslot >= MIN_TIMESLOT)
+    mask = arrays.per_row(keep) & (arrays.query_ids == TARGET_QUERY_ID)
+
+    # Mean of the last values of each variation
+    variation = arrays.per_row(np.arange(len(keep)))[mask]
+    counts = np.bincount(variation, minlength=len(keep))
+    sums = np.bincount(variation, weights=arrays.last_values[mask], minlength=len(keep))
+    has_values = counts > 0
+    x_vals = timeslot[has_values]
+    y_vals = bitstuffing[has_values] + Y_OFFSET
+    z_vals = sums[has_values] / counts[has_values]
+
+    # The experiments sweep a full timeslot x bitstuffing grid, draw it as one
+    # without triangulating. Anything else falls back to a triangulated surface
+    xs, xi = np.unique(x_vals, return_inverse=True)
+    ys, yi = np.unique(y_vals, return_inverse=True)
+    if len(z_vals) == len(xs) * len(ys) and len(xs) > 1 and len(ys) > 1:
+        Z = np.full((len(xs), len(ys)), np.nan)
+        Z[xi, yi] = z_vals
+        if not np.isnan(Z).any():
+            X, Y = np.meshgrid(xs, ys, indexing='ij')
+            ax.plot_surface(X, Y, Z, **plot_args)
+            return
     ax.plot_trisurf(x_vals, y_vals, z_vals, **plot_args)
 
 def shifting_error_qubit(ax, data):